@@ -1,36 +1,113 @@
 import os
+import atexit
 import logging
+import threading
 from flask import (
-    Flask, render_template, request, redirect, url_for, flash, session, jsonify
+    Flask, render_template, request, redirect, url_for, flash, session, jsonify, abort
 )
-from werkzeug.security import generate_password_hash, check_password_hash
-import gspread
-
-# --- Beam Calculator Imports --- (No changes here)
-from beam_calculator import BeamCalculator
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import io
+
+# --- Beam Calculator Imports ---
+# numpy, scipy, matplotlib and gspread load on first use (see build_calculator,
+# render_images and get_user_directory) so a cold start can serve /login and
+# static pages without them; benchmarks/import_budget.py keeps it that way.
+from result_cache import ResultCache, beam_cache_key, combinations_cache_key
+from user_directory import SheetsUserDirectory
+from instrumentation import Instrumentation, LogSink, HistogramSink, stage
+from render_pool import RenderPool, RenderBusy, RenderTimeout
+from auth_workers import HashingPool, HashingBusy, AttemptThrottle, SheetWriteQueue
 import base64
+from concurrent.futures.process import BrokenProcessPool
+from itertools import zip_longest
 
 # --- Basic Configuration ---
 logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "a-very-secret-key")
 
+# Rendered results of recent calculations, keyed by the canonical beam definition
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("RESULT_CACHE_ENTRIES", 256)),
+    max_bytes=int(os.environ.get("RESULT_CACHE_BYTES", 64 * 1024 * 1024)),
+)
+
+# Per-stage request timings; a sample of slow requests is also profiled
+instrumentation = Instrumentation(
+    sinks=[LogSink(), HistogramSink()],
+    profile_rate=float(os.environ.get("PROFILE_SAMPLE_RATE", 0)),
+    outlier_seconds=float(os.environ.get("SLOW_REQUEST_SECONDS", 1.0)),
+)
+
+# Plots render in a pool of warm worker processes; RENDER_WORKERS=0 renders on the request thread
+render_workers = int(os.environ.get("RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+render_pool = RenderPool(
+    workers=render_workers,
+    max_pending=int(os.environ.get("RENDER_MAX_PENDING", 0)) or None,
+    timeout=float(os.environ.get("RENDER_TIMEOUT", 30)),
+) if render_workers > 0 else None
+
+# Plot output: format (png, png-optimized, webp or svg), pixel width (0 for the
+# default 150 dpi) and delivery, either inline data URIs or "url" for images
+# served separately from /plots/ with ETags. The form may override the first two.
+PLOT_FORMAT = os.environ.get("PLOT_FORMAT", "png")
+PLOT_WIDTH = int(os.environ.get("PLOT_WIDTH", 0)) or None
+PLOT_DELIVERY = os.environ.get("PLOT_DELIVERY", "inline")
+
+# Password hashing runs on a few pool threads so a login burst cannot take
+# every request thread; each email gets a limited number of attempts per minute
+hashing_pool = HashingPool(
+    workers=int(os.environ.get("HASH_WORKERS", 2)),
+    timeout=float(os.environ.get("HASH_TIMEOUT", 10)),
+)
+login_throttle = AttemptThrottle(
+    max_attempts=int(os.environ.get("LOGIN_ATTEMPTS", 5)),
+    window=float(os.environ.get("LOGIN_WINDOW", 60)),
+)
+
 # --- Google Sheets Integration ---
-try:
-    # Use the JSON key to authenticate
-    gc = gspread.service_account(filename='credentials.json')
-    # Open the Google Sheet by its name
-    sh = gc.open("WebAppUsers").sheet1  # Assumes the first sheet
-except FileNotFoundError:
-    logging.error("credentials.json not found. Please follow setup instructions.")
-    sh = None
-except gspread.exceptions.SpreadsheetNotFound:
-    logging.error("Spreadsheet 'WebAppUsers' not found. Please create it and share it.")
-    sh = None
+# Users are looked up in an in-process index of the sheet instead of downloading it per login,
+# and new users are appended through a write-behind queue in batches.
+# The sheet is connected on the first login attempt rather than at import.
+users = None
+_users_lock = threading.Lock()
+
+# On AWS Lambda (serverless-wsgi) an instance is frozen between requests and
+# can be dropped without running exit handlers, so a queued signup could be
+# lost after the user was told it succeeded; there rows are appended before
+# responding unless SHEET_WRITE_BEHIND says otherwise.
+SHEET_WRITE_BEHIND = os.environ.get(
+    "SHEET_WRITE_BEHIND", "0" if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") else "1") == "1"
+
+
+def _connect_user_sheet():
+    import gspread
+    try:
+        # Use the JSON key to authenticate
+        gc = gspread.service_account(filename='credentials.json')
+        # Open the Google Sheet by its name
+        return gc.open("WebAppUsers").sheet1  # Assumes the first sheet
+    except FileNotFoundError:
+        logging.error("credentials.json not found. Please follow setup instructions.")
+    except gspread.exceptions.SpreadsheetNotFound:
+        logging.error("Spreadsheet 'WebAppUsers' not found. Please create it and share it.")
+    return None
+
+
+def get_user_directory():
+    """The user directory, connecting to Google Sheets on first use; None if unavailable"""
+    global users
+    if users is None:
+        with _users_lock:
+            if users is None:
+                sh = _connect_user_sheet()
+                if sh is not None:
+                    writer = None
+                    if SHEET_WRITE_BEHIND:
+                        writer = SheetWriteQueue(sh)
+                        # The writer is a daemon thread; write what is queued before the process exits
+                        atexit.register(writer.close, float(os.environ.get("SHEET_DRAIN_TIMEOUT", 30)))
+                    users = SheetsUserDirectory(sh, ttl=float(os.environ.get("USER_DIRECTORY_TTL", 60)),
+                                                writer=writer)
+    return users
 
 
 # --- Authentication Routes ---
@@ -38,24 +115,29 @@ except gspread.exceptions.SpreadsheetNotFound:
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     """Handles user login and signup using Google Sheets as the database."""
-    if sh is None:
-        flash("Application is not configured correctly to connect to the user database.", "error")
-        return render_template('random.html')
-
     if request.method == 'POST':
+        users = get_user_directory()
+        if users is None:
+            flash("Application is not configured correctly to connect to the user database.", "error")
+            return render_template('random.html')
+        import gspread
+
         data = request.json
         action = data.get("action")
         email = data.get("email", "").lower()
         password = data.get("password")
 
-        # --- Find all existing users from the sheet ---
+        # --- Look the user up in the cached directory ---
         try:
-            user_records = sh.get_all_records()
+            existing_user = users.find(email)
         except gspread.exceptions.GSpreadException as e:
             logging.error(f"Error accessing Google Sheet: {e}")
             return jsonify({"success": False, "message": "Could not connect to user database."}), 500
-        
-        existing_user = next((user for user in user_records if user.get('Email', '').lower() == email), None)
+
+        if action in ("signup", "login") and not login_throttle.allow(email):
+            retry_after = int(login_throttle.retry_after(email)) + 1
+            return jsonify({"success": False, "message": "Too many attempts. Please try again later."}), \
+                429, {'Retry-After': str(retry_after)}
 
         if action == "signup":
             name = data.get("name")
@@ -66,10 +148,19 @@ def login():
                 return jsonify({"success": False, "message": "This email is already registered."}), 409
             
             # 🔒 Hash the password for security before storing
-            hashed_password = generate_password_hash(password)
+            try:
+                hashed_password = hashing_pool.hash_password(password)
+            except HashingBusy as e:
+                logging.warning(f"Signup rejected: {str(e)}")
+                return jsonify({"success": False, "message": "The server is busy, please try again."}), \
+                    503, {'Retry-After': '2'}
             
-            # Add the new user to the sheet
-            sh.append_row([name, email, hashed_password])
+            # Add the new user to the sheet and the directory index
+            try:
+                users.add(name, email, hashed_password)
+            except gspread.exceptions.GSpreadException as e:
+                logging.error(f"Error accessing Google Sheet: {e}")
+                return jsonify({"success": False, "message": "Could not connect to user database."}), 500
             
             session['logged_in'] = True
             session['name'] = name
@@ -77,10 +168,18 @@ def login():
             return jsonify({"success": True, "message": "Signup successful."})
 
         elif action == "login":
-            if not existing_user or not check_password_hash(existing_user.get('Password'), password):
+            try:
+                valid = existing_user is not None and hashing_pool.check_password(existing_user.get('Password'),
+                                                                                  password)
+            except HashingBusy as e:
+                logging.warning(f"Login rejected: {str(e)}")
+                return jsonify({"success": False, "message": "The server is busy, please try again."}), \
+                    503, {'Retry-After': '2'}
+            if not valid:
                 return jsonify({"success": False, "message": "Invalid email or password."}), 401
             
             # Login successful
+            login_throttle.reset(email)
             session['logged_in'] = True
             session['name'] = existing_user.get('Name')
             flash(f"Welcome back, {session['name']}!", "success")
@@ -104,68 +203,201 @@ def logout():
     flash("You have been logged out.", "info")
     return redirect(url_for('login'))
 
-@app.route('/calculate', methods=['POST'])
-def calculate():
-    """Process beam calculation and display results. Protected route."""
-    if not session.get('logged_in'):
-        flash("Please log in to perform a calculation.", "error")
-        return redirect(url_for('login'))
-        
-    # (The entire calculation logic you already have goes here, no changes needed)
+
+class BeamInputError(ValueError):
+    """Invalid beam or load input, reported to the user as-is"""
+
+
+def parse_support_positions(text):
+    """Support positions of a continuous beam from a comma separated string such as "0, 4, 8" """
     try:
-        beam_length = float(request.form.get('beam_length', 0))
-        young_modulus = float(request.form.get('young_modulus', 0))
-        moment_inertia = float(request.form.get('moment_inertia', 0))
-        support_type = request.form.get('support_type', 'simply_supported')
-        
-        if beam_length <= 0 or young_modulus <= 0 or moment_inertia <= 0:
-            flash('All beam properties must be positive values.', 'error')
-            return redirect(url_for('index'))
-        
+        return [float(part) for part in text.replace(';', ',').split(',') if part.strip()]
+    except ValueError:
+        raise BeamInputError(f'Invalid support positions: {text}')
+
+
+def build_calculator(beam_length, young_modulus, moment_inertia, support_type, loads, supports=None):
+    """
+    Create a loaded BeamCalculator from request data.
+
+    loads is a sequence of (type, magnitude, position, length) with values
+    as submitted; length only applies to distributed loads and defaults to 1m.
+    Statically indeterminate support types get a ContinuousBeamCalculator;
+    supports lists the pin positions of a continuous beam (both ends by default).
+    """
+    if beam_length <= 0 or young_modulus <= 0 or moment_inertia <= 0:
+        raise BeamInputError('All beam properties must be positive values.')
+    if not loads:
+        raise BeamInputError('At least one load must be specified.')
+    
+    from continuous_beam import ContinuousBeamCalculator, SUPPORT_TYPES
+    if support_type in SUPPORT_TYPES:
+        try:
+            calculator = ContinuousBeamCalculator(beam_length, young_modulus, moment_inertia,
+                                                  support_type, supports or None)
+        except ValueError as e:
+            raise BeamInputError(str(e))
+    else:
+        from beam_calculator import BeamCalculator
         calculator = BeamCalculator(beam_length, young_modulus, moment_inertia, support_type)
-        
-        load_types = request.form.getlist('load_type[]')
-        load_magnitudes = request.form.getlist('load_magnitude[]')
-        load_positions = request.form.getlist('load_position[]')
-        load_lengths = request.form.getlist('load_length[]')
-        
-        if not load_types:
-            flash('At least one load must be specified.', 'error')
-            return redirect(url_for('index'))
-        
-        for i, load_type in enumerate(load_types):
+    
+    with stage('add_loads'):
+        for i, (load_type, magnitude, position, length) in enumerate(loads):
             try:
-                magnitude = float(load_magnitudes[i])
-                position = float(load_positions[i])
+                magnitude = float(magnitude)
+                position = float(position)
                 
                 if load_type == 'point':
                     calculator.add_point_load(magnitude, position)
                 elif load_type == 'distributed':
-                    length = float(load_lengths[i]) if i < len(load_lengths) and load_lengths[i] else 1.0
+                    length = float(length) if length not in (None, '') else 1.0
                     calculator.add_distributed_load(magnitude, position, length)
-            except (ValueError, IndexError) as e:
-                flash(f'Invalid load data at position {i+1}: {str(e)}', 'error')
-                return redirect(url_for('index'))
+            except (TypeError, ValueError) as e:
+                raise BeamInputError(f'Invalid load data at position {i+1}: {str(e)}')
+    
+    return calculator
+
+
+def build_load_combinations(beam_length, young_modulus, moment_inertia, support_type, loads, load_cases,
+                            supports=None):
+    """
+    LoadCombinations of the submitted loads grouped by load case, or None
+    when they all belong to one case and are analysed as entered.
+
+    load_cases gives the case of each load; missing entries default to dead.
+    """
+    from load_combinations import LoadCombinations, LOAD_CASES
+    cases = [case or LOAD_CASES[0] for case in load_cases]
+    cases += [LOAD_CASES[0]] * (len(loads) - len(cases))
+    unknown = set(cases) - set(LOAD_CASES)
+    if unknown:
+        raise BeamInputError(f'Unknown load case: {sorted(unknown)[0]}')
+    if len(set(cases)) < 2:
+        return None
+    
+    grouped = {}
+    for case, load in zip(cases, loads):
+        grouped.setdefault(case, []).append(load)
+    return LoadCombinations({
+        case: build_calculator(beam_length, young_modulus, moment_inertia, support_type, grouped[case], supports)
+        for case in LOAD_CASES if case in grouped
+    })
+
+
+def analyse(calculator, combinations):
+    """
+    Calculate a beam, or solve its load combinations and calculate the one
+    governing the bending moment. Returns the calculated beam.
+    """
+    if combinations is not None:
+        combinations.solve()
+        calculator = combinations.combined(combinations.governing())
+    calculator.calculate()
+    return calculator
+
+
+def render_images(calculator, fmt='png', width=None):
+    """Encoded bytes of a calculated beam's plots, rendered in the pool when there is one"""
+    global render_pool
+    from plot_renderer import plot_payload
+    if render_pool is not None:
+        try:
+            return render_pool.render(plot_payload(calculator), fmt=fmt, width=width)
+        except OSError as e:
+            # Some hosts cannot start worker processes; fall back to this thread for good
+            logging.error(f"Render pool unavailable, rendering in-process: {e}")
+            render_pool = None
+        except BrokenProcessPool as e:
+            # A worker died mid-render; the pool starts fresh workers for the next request
+            logging.error(f"Render pool broke, rendering this request in-process: {e}")
+    return calculator.render_plots(fmt=fmt, dpi=150, width=width)
+
+
+def plot_sources(cache_key, images, fmt, delivery):
+    """img src of every plot: a /plots/ URL, or the image inlined as a data URI"""
+    if delivery == 'url':
+        return {name: url_for('plot_image', key=cache_key, name=name) for name in images}
+    
+    from plot_renderer import IMAGE_FORMATS
+    with stage('encode'):
+        return {name: f"data:{IMAGE_FORMATS[fmt]};base64,{base64.b64encode(image).decode()}"
+                for name, image in images.items()}
+
+
+@app.route('/calculate', methods=['POST'])
+@instrumentation.traced('calculate')
+def calculate():
+    """Process beam calculation and display results. Protected route."""
+    if not session.get('logged_in'):
+        flash("Please log in to perform a calculation.", "error")
+        return redirect(url_for('login'))
         
-        calculator.calculate()
-        plots = calculator.generate_plots()
+    # (The entire calculation logic you already have goes here, no changes needed)
+    try:
+        with stage('parse_form'):
+            load_lengths = request.form.getlist('load_length[]')
+            loads = [
+                (load_type, magnitude, position, load_lengths[i] if i < len(load_lengths) else None)
+                for i, (load_type, magnitude, position) in enumerate(zip_longest(
+                    request.form.getlist('load_type[]'),
+                    request.form.getlist('load_magnitude[]'),
+                    request.form.getlist('load_position[]')))
+            ]
+            beam_length = float(request.form.get('beam_length', 0))
+            young_modulus = float(request.form.get('young_modulus', 0))
+            moment_inertia = float(request.form.get('moment_inertia', 0))
+            support_type = request.form.get('support_type', 'simply_supported')
+            plot_format = request.form.get('plot_format') or PLOT_FORMAT
+            plot_width = int(request.form.get('plot_width') or 0) or PLOT_WIDTH
+            supports = parse_support_positions(request.form.get('support_positions', ''))
+            load_cases = request.form.getlist('load_case[]')
+        combinations = build_load_combinations(beam_length, young_modulus, moment_inertia, support_type,
+                                               loads, load_cases, supports)
+        if combinations is None:
+            calculator = build_calculator(beam_length, young_modulus, moment_inertia, support_type, loads,
+                                          supports)
+            beam_key = beam_cache_key(calculator)
+        else:
+            calculator = None
+            beam_key = combinations_cache_key(combinations)
         
-        plot_data = {}
-        for plot_name, fig in plots.items():
-            img_buffer = io.BytesIO()
-            fig.savefig(img_buffer, format='png', dpi=150, bbox_inches='tight')
-            img_buffer.seek(0)
-            plot_data[plot_name] = base64.b64encode(img_buffer.getvalue()).decode()
-            plt.close(fig)
+        from plot_renderer import IMAGE_FORMATS
+        if plot_format not in IMAGE_FORMATS:
+            raise BeamInputError(f'Unknown plot format: {plot_format}')
+        if plot_width is not None and not 200 <= plot_width <= 4000:
+            raise BeamInputError('Plot width must be between 200 and 4000 pixels.')
         
-        results = calculator.get_results()
+        # Repeat submissions skip both the numerics and the rendering. The
+        # cache holds the encoded image bytes; base64 is only applied for
+        # inline delivery, per response.
+        cache_key = f"{beam_key}.{plot_format}.{plot_width or 0}"
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            logging.debug(f"Result cache hit for {cache_key[:12]}")
+            images, results = cached['plots'], cached['results']
+        else:
+            calculator = analyse(calculator, combinations)
+            with stage('render'):
+                images = render_images(calculator, plot_format, plot_width)
+            
+            results = calculator.get_results()
+            if combinations is not None:
+                results['envelope'] = combinations.get_results()
+            result_cache.put(cache_key, images, results)
         
         return render_template('results.html', 
-                             plots=plot_data, 
+                             plots=plot_sources(cache_key, images, plot_format, PLOT_DELIVERY), 
                              results=results,
                              beam_length=beam_length,
                              support_type=support_type)
         
+    except (RenderBusy, RenderTimeout) as e:
+        logging.warning(f"Rendering rejected: {str(e)}")
+        flash('The server is busy right now, please try again in a moment.', 'error')
+        return render_template('index.html'), 503, {'Retry-After': '2'}
+    except BeamInputError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('index'))
     except ValueError as e:
         flash(f'Input error: {str(e)}', 'error')
         return redirect(url_for('index'))
@@ -175,5 +407,134 @@ def calculate():
         return redirect(url_for('index'))
 
 
+@app.route('/plots/<key>/<name>')
+def plot_image(key, name):
+    """
+    One plot of a cached /calculate result, for PLOT_DELIVERY=url.
+
+    The cache key identifies the beam, format and width, so it makes a
+    strong ETag and repeat requests are answered 304 Not Modified.
+    """
+    if not session.get('logged_in'):
+        abort(401)
+    # Image fetches follow a /calculate that already counted as a hit or miss
+    cached = result_cache.peek(key)
+    if cached is None or name not in cached['plots']:
+        abort(404)
+    
+    from plot_renderer import IMAGE_FORMATS
+    response = app.response_class(cached['plots'][name], mimetype=IMAGE_FORMATS[key.split('.')[1]])
+    response.set_etag(f"{key}.{name}")
+    response.cache_control.private = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
+
+@app.route('/api/calculate', methods=['POST'])
+@instrumentation.traced('api_calculate')
+def api_calculate():
+    """
+    JSON version of /calculate returning diagram data instead of rendered plots.
+
+    Accepts the beam fields of the form plus a "loads" list of
+    {"type", "magnitude", "position", "length", "case"} objects and, for
+    continuous beams, a "supports" list of positions. Loads spread over
+    several cases are combined: the diagrams show the combination governing
+    the moment and "envelope" summarises all of them. Optional "encoding"
+    ("list" or "base64" float32) and "tolerance" (relative simplification
+    error, e.g. 0.001) control the size of the returned series.
+    """
+    if not session.get('logged_in'):
+        return jsonify({"success": False, "message": "Please log in to perform a calculation."}), 401
+    
+    from diagram_data import SERIES_ENCODINGS, diagram_series
+    data = request.get_json(silent=True) or {}
+    encoding = data.get('encoding', 'list')
+    if encoding not in SERIES_ENCODINGS:
+        return jsonify({"success": False, "message": f"Unknown encoding: {encoding}"}), 400
+    
+    try:
+        loads = [(load.get('type'), load.get('magnitude'), load.get('position'), load.get('length'))
+                 for load in data.get('loads') or []]
+        beam = (float(data.get('beam_length', 0)), float(data.get('young_modulus', 0)),
+                float(data.get('moment_inertia', 0)), data.get('support_type', 'simply_supported'))
+        combinations = build_load_combinations(*beam, loads, [load.get('case') for load in data.get('loads') or []],
+                                               data.get('supports'))
+        calculator = build_calculator(*beam, loads, data.get('supports')) if combinations is None else None
+        tolerance = data.get('tolerance')
+        tolerance = float(tolerance) if tolerance is not None else None
+        
+        calculator = analyse(calculator, combinations)
+        results = calculator.get_results()
+        if combinations is not None:
+            results['envelope'] = combinations.get_results()
+        with stage('encode'):
+            results['diagrams'] = diagram_series(calculator, encoding, tolerance)
+        results['encoding'] = encoding
+        results['success'] = True
+        return jsonify(results)
+    
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({"success": False, "message": f"Input error: {str(e)}"}), 400
+    except Exception as e:
+        logging.error(f"Calculation error: {str(e)}")
+        return jsonify({"success": False, "message": "An unexpected error occurred."}), 500
+
+
+@app.route('/api/optimize-section', methods=['POST'])
+@instrumentation.traced('api_optimize_section')
+def api_optimize_section():
+    """
+    Lightest catalog sections meeting a deflection and a stress limit.
+
+    Takes the beam and loads of /api/calculate; E and I are optional since
+    the loads are solved once and every section is screened against the
+    result. Optional "deflection_limit" (span / limit, default 360),
+    "materials", "shapes" and "count" narrow the search.
+    """
+    if not session.get('logged_in'):
+        return jsonify({"success": False, "message": "Please log in to perform a calculation."}), 401
+    
+    from section_catalog import optimize_section
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        loads = [(load.get('type'), load.get('magnitude'), load.get('position'), load.get('length'))
+                 for load in data.get('loads') or []]
+        # Any positive EI will do: it cancels out of the screening
+        beam = (float(data.get('beam_length', 0)), float(data.get('young_modulus') or 1.0),
+                float(data.get('moment_inertia') or 1.0), data.get('support_type', 'simply_supported'))
+        combinations = build_load_combinations(*beam, loads, [load.get('case') for load in data.get('loads') or []],
+                                               data.get('supports'))
+        analysis = combinations or build_calculator(*beam, loads, data.get('supports'))
+        
+        results = optimize_section(analysis, float(data.get('deflection_limit', 360)), int(data.get('count', 5)),
+                                   data.get('materials'), data.get('shapes'))
+        results['success'] = True
+        return jsonify(results)
+    
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({"success": False, "message": f"Input error: {str(e)}"}), 400
+    except Exception as e:
+        logging.error(f"Section optimization error: {str(e)}")
+        return jsonify({"success": False, "message": "An unexpected error occurred."}), 500
+
+@app.route('/metrics')
+def metrics():
+    """Request stage histograms and result cache counters in Prometheus text format"""
+    histograms = instrumentation.sink(HistogramSink)
+    text = histograms.prometheus_text() if histograms is not None else ''
+    lines = []
+    for name, value in result_cache.stats().items():
+        lines.append(f'# TYPE beam_result_cache_{name} gauge')
+        lines.append(f'beam_result_cache_{name} {value}')
+    writer = getattr(users, 'writer', None)
+    if writer is not None:
+        for name, value in writer.stats.items():
+            lines.append(f'# TYPE beam_user_writes_{name} counter')
+            lines.append(f'beam_user_writes_{name} {value}')
+    return text + '\n'.join(lines) + '\n', 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,230 @@
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool already has as many requests as it accepts"""
+
+
+class HashingPool:
+    """
+    Bounded pool of threads for password hashing and checking.
+
+    werkzeug's PBKDF2 / scrypt hashes are deliberately slow but run in
+    hashlib with the GIL released, so a few threads keep a signup or login
+    burst to that many cores instead of one per request thread. At most
+    max_pending hashes are admitted at a time; later ones raise HashingBusy
+    straight away, like RenderPool, and one that does not finish within
+    timeout seconds raises HashingBusy too. A hash keeps its slot until it
+    finishes, even once its caller has given up waiting.
+    """
+
+    def __init__(self, workers=2, max_pending=None, timeout=10):
+        self.workers = workers
+        self.max_pending = max_pending or 4 * workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='hashing')
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(f"All {self.max_pending} hashing slots are in use")
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Free the slot when the hash is done or cancelled, not when the caller stops waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()
+            raise HashingBusy(f"Hashing did not finish within {self.timeout}s")
+
+    def hash_password(self, password):
+        """generate_password_hash on a pool thread"""
+        return self._run(generate_password_hash, password)
+
+    def check_password(self, password_hash, password):
+        """check_password_hash on a pool thread"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class AttemptThrottle:
+    """
+    Per-email sliding window limit on login and signup attempts.
+
+    allow() records an attempt and says whether it may go ahead: at most
+    max_attempts per email within window seconds. Emails with no recent
+    attempts are forgotten, so memory follows the active emails only.
+    """
+
+    def __init__(self, max_attempts=5, window=60):
+        self.max_attempts = max_attempts
+        self.window = window
+        self._lock = threading.Lock()
+        self._attempts = {}
+        self._pruned_at = time.monotonic()
+
+    def _prune(self, now):
+        """Drop emails whose attempts have all left the window, at most once per window"""
+        if now - self._pruned_at < self.window:
+            return
+        self._attempts = {email: times for email, times in self._attempts.items()
+                          if times and now - times[-1] < self.window}
+        self._pruned_at = now
+
+    def allow(self, email):
+        """Record an attempt for email; False when it is over the limit"""
+        email = email.strip().lower()
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            times = self._attempts.setdefault(email, deque())
+            while times and now - times[0] >= self.window:
+                times.popleft()
+            if len(times) >= self.max_attempts:
+                return False
+            times.append(now)
+            return True
+
+    def retry_after(self, email):
+        """Seconds until email may try again, 0 if it may now"""
+        email = email.strip().lower()
+        with self._lock:
+            times = self._attempts.get(email)
+            if not times or len(times) < self.max_attempts:
+                return 0
+            return max(0.0, self.window - (time.monotonic() - times[0]))
+
+    def reset(self, email):
+        """Forget the attempts of email, e.g. after a successful login"""
+        with self._lock:
+            self._attempts.pop(email.strip().lower(), None)
+
+
+class SheetWriteQueue:
+    """
+    Write-behind queue appending rows to a worksheet in batches.
+
+    put() returns at once; a background thread waits up to delay seconds
+    for more rows and writes up to batch_size of them with one append_rows
+    call. A failed write is retried with exponential backoff from
+    retry_delay seconds, keeping the rows in order, until it succeeds or
+    the queue is closed. worksheet is a gspread Worksheet or anything with
+    append_rows, such as InMemoryWorksheet.
+    """
+
+    def __init__(self, worksheet, batch_size=50, delay=0.5, retry_delay=1.0, max_retry_delay=60):
+        self.worksheet = worksheet
+        self.batch_size = batch_size
+        self.delay = delay
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._condition = threading.Condition()
+        self._rows = deque()
+        self._in_flight = []
+        self._closed = False
+        self._flushing = False
+        self.stats = {'rows': 0, 'batches': 0, 'retries': 0}
+        self._thread = threading.Thread(target=self._run, name='sheet-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, row):
+        """Queue one row for appending"""
+        with self._condition:
+            if self._closed:
+                raise ValueError("Write queue is closed")
+            self._rows.append(list(row))
+            self._condition.notify_all()
+
+    def pending(self):
+        """Rows queued or being written, oldest first"""
+        with self._condition:
+            return [list(row) for row in self._in_flight] + [list(row) for row in self._rows]
+
+    def _next_batch(self):
+        """Wait for rows, then give more a short while to arrive; None once closed and drained"""
+        with self._condition:
+            while not self._rows and not self._closed:
+                self._condition.wait()
+            deadline = time.monotonic() + self.delay
+            while len(self._rows) < self.batch_size and not (self._closed or self._flushing):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if not self._rows:
+                return None
+            count = min(self.batch_size, len(self._rows))
+            self._in_flight = [self._rows.popleft() for _ in range(count)]
+            self._flushing = self._flushing and bool(self._rows)
+            return self._in_flight
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not self._write(batch):
+                return
+            with self._condition:
+                self._in_flight = []
+                self.stats['rows'] += len(batch)
+                self.stats['batches'] += 1
+                self._condition.notify_all()
+            logging.debug(f"Appended {len(batch)} rows to the sheet")
+
+    def _write(self, batch):
+        """Append a batch, retrying with backoff; False when the queue closed before it succeeded"""
+        delay = self.retry_delay
+        while True:
+            try:
+                self.worksheet.append_rows(batch)
+                return True
+            except Exception as e:
+                self.stats['retries'] += 1
+                with self._condition:
+                    if self._closed:
+                        logging.error(f"Appending rows failed after close, {len(self._in_flight) + len(self._rows)} "
+                                      f"rows left unwritten: {e}")
+                        return False
+                    logging.warning(f"Appending {len(batch)} rows failed, retrying in {delay:.1f}s: {e}")
+                    self._condition.wait_for(lambda: self._closed, timeout=delay)
+                delay = min(2 * delay, self.max_retry_delay)
+
+    def flush(self, timeout=None):
+        """Write queued rows now, without the batching delay, and wait for them; False on timeout"""
+        with self._condition:
+            self._flushing = bool(self._rows)
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._rows and not self._in_flight, timeout=timeout)
+
+    def close(self, timeout=None):
+        """
+        Write what is queued, skipping the batching delay, and stop the
+        writer thread. Rows that still fail to write stay in pending().
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
@@ -0,0 +1,233 @@
+import numpy as np
+import logging
+
+from beam_calculator import (
+    _load_resultants, _cantilever_reactions, _simply_supported_reactions,
+    _shear_force, _bending_moment, _slope_and_deflection
+)
+
+SUPPORT_TYPES = ('cantilever', 'simply_supported')
+
+
+class BeamBatch:
+    """
+    Structure-of-arrays description of N beams for batch analysis.
+
+    Beam properties are length-N arrays (scalars are broadcast). Loads are
+    (N, k) arrays padded with zero magnitudes, so beams may carry different
+    numbers of loads.
+    """
+    
+    def __init__(self, lengths, young_moduli, moments_inertia, support_types='simply_supported',
+                 point_magnitudes=None, point_positions=None,
+                 distributed_magnitudes=None, distributed_starts=None, distributed_ends=None):
+        self.L, self.E, self.I = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(lengths, dtype=float)),
+            np.atleast_1d(np.asarray(young_moduli, dtype=float)),
+            np.atleast_1d(np.asarray(moments_inertia, dtype=float)))
+        n_beams = len(self.L)
+        self.EI = self.E * self.I
+        
+        self.support_types = np.broadcast_to(np.asarray(support_types, dtype=object), (n_beams,))
+        unknown = set(self.support_types) - set(SUPPORT_TYPES)
+        if unknown:
+            raise ValueError(f"Unsupported beam type: {sorted(unknown)[0]}")
+        self.cantilever = self.support_types == 'cantilever'
+        
+        self.point_magnitudes = self._load_array(point_magnitudes, n_beams)
+        self.point_positions = self._load_array(point_positions, n_beams)
+        self.distributed_magnitudes = self._load_array(distributed_magnitudes, n_beams)
+        self.distributed_starts = self._load_array(distributed_starts, n_beams)
+        self.distributed_ends = self._load_array(distributed_ends, n_beams)
+        
+        if self.point_magnitudes.shape != self.point_positions.shape:
+            raise ValueError("Point load magnitudes and positions must have the same shape")
+        if not (self.distributed_magnitudes.shape == self.distributed_starts.shape == self.distributed_ends.shape):
+            raise ValueError("Distributed load magnitudes, starts and ends must have the same shape")
+        
+        length = self.L[:, np.newaxis]
+        if np.any((self.point_positions < 0) | (self.point_positions > length)):
+            raise ValueError("Point load position is outside beam length")
+        if np.any((self.distributed_starts < 0) | (self.distributed_ends > length)
+                  | (self.distributed_ends < self.distributed_starts)):
+            raise ValueError("Distributed load extends outside beam length")
+    
+    @staticmethod
+    def _load_array(values, n_beams):
+        """Return loads as an (N, k) float array, empty when not given"""
+        if values is None:
+            return np.zeros((n_beams, 0))
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[np.newaxis, :]
+        return np.ascontiguousarray(np.broadcast_to(values, (n_beams, values.shape[-1])))
+    
+    @classmethod
+    def from_calculators(cls, calculators):
+        """Build a batch from existing BeamCalculator objects, padding their loads"""
+        if any(c.profile_loads or not c.prismatic for c in calculators):
+            raise ValueError("Batches only hold point and uniform loads on prismatic beams")
+        columns = [c.load_columns() for c in calculators]
+        n_point = max((len(P) for P, a, w, s, e in columns), default=0)
+        n_dist = max((len(w) for P, a, w, s, e in columns), default=0)
+        point = np.zeros((2, len(calculators), n_point))
+        dist = np.zeros((3, len(calculators), n_dist))
+        for i, (P, a, w, s, e) in enumerate(columns):
+            point[:, i, :len(P)] = (P, a)
+            dist[:, i, :len(w)] = (w, s, e)
+        
+        return cls([c.L for c in calculators], [c.E for c in calculators], [c.I for c in calculators],
+                   [c.support_type for c in calculators],
+                   point[0], point[1], dist[0], dist[1], dist[2])
+    
+    def __len__(self):
+        return len(self.L)
+    
+    def loads(self, rows=slice(None)):
+        """Load arrays (P, a, w, start, end) for the selected beams"""
+        return (self.point_magnitudes[rows], self.point_positions[rows],
+                self.distributed_magnitudes[rows], self.distributed_starts[rows],
+                self.distributed_ends[rows])
+
+
+def analyze_batch(batch, n_points=1000, diagrams=False, chunk_size=None):
+    """
+    Analyze every beam in a BeamBatch with one vectorized pass per chunk.
+
+    Each beam is evaluated at n_points evenly spaced stations plus, like
+    BeamCalculator.analysis_stations, its load positions, the left limits of
+    its shear jumps and its zero-shear points, so the maxima are exact.
+
+    Returns a dict of stacked NumPy arrays: reactions (R_A, R_B for simply
+    supported beams, R_y, M_fixed for cantilevers, NaN where not applicable),
+    max_shear, max_moment, max_deflection and max_deflection_position. With
+    diagrams=True it also holds (N, stations) arrays of x_points, shear_force,
+    bending_moment and deflection.
+    """
+    n_beams = len(batch)
+    n_point = batch.point_magnitudes.shape[1]
+    n_dist = batch.distributed_magnitudes.shape[1]
+    n_stations = n_points + 2 * (2 + n_point + 2 * n_dist) - 1 + n_point
+    if chunk_size is None:
+        # Keep the (beams, stations, loads) work arrays at a few million elements
+        chunk_size = max(1, 4_000_000 // (n_stations * max(n_point + n_dist, 1)))
+    
+    # Reactions for every beam use the same equilibrium kernels as BeamCalculator
+    total, moment = _load_resultants(*batch.loads())
+    cantilever_reactions = _cantilever_reactions(total, moment)
+    simply_supported_reactions = _simply_supported_reactions(total, moment, batch.L)
+    results = {
+        'R_A': np.where(batch.cantilever, np.nan, simply_supported_reactions['R_A']),
+        'R_B': np.where(batch.cantilever, np.nan, simply_supported_reactions['R_B']),
+        'R_y': np.where(batch.cantilever, cantilever_reactions['R_y'], np.nan),
+        'M_fixed': np.where(batch.cantilever, cantilever_reactions['M_fixed'], np.nan),
+    }
+    
+    # Shear and sagging moment just inside the left end
+    F0 = np.where(batch.cantilever, cantilever_reactions['R_y'], simply_supported_reactions['R_A'])
+    C0 = np.where(batch.cantilever, -cantilever_reactions['M_fixed'], 0.0)
+    
+    for name in ('max_shear', 'max_moment', 'max_deflection', 'max_deflection_position'):
+        results[name] = np.empty(n_beams)
+    if diagrams:
+        for name in ('x_points', 'shear_force', 'bending_moment', 'deflection'):
+            results[name] = np.empty((n_beams, n_stations))
+    
+    unit_stations = np.linspace(0, 1, n_points)
+    for first in range(0, n_beams, chunk_size):
+        rows = slice(first, min(first + chunk_size, n_beams))
+        loads = batch.loads(rows)
+        cantilever, length, EI = batch.cantilever[rows], batch.L[rows], batch.EI[rows]
+        x = _batch_stations(length[:, np.newaxis] * unit_stations, F0[rows], loads)
+        
+        shear = _shear_force(x, F0[rows], loads)
+        moment_diagram = _bending_moment(x, cantilever, F0[rows], C0[rows], loads)
+        slope, deflection = _slope_and_deflection(x, cantilever, length, EI, F0[rows], C0[rows], loads)
+        
+        results['max_shear'][rows] = np.max(np.abs(shear), axis=1)
+        results['max_moment'][rows] = np.max(np.abs(moment_diagram), axis=1)
+        position, value = _locate_max_deflection(x, slope, deflection, cantilever, length, EI,
+                                                 F0[rows], C0[rows], loads)
+        results['max_deflection_position'][rows] = position
+        results['max_deflection'][rows] = value
+        
+        if diagrams:
+            results['x_points'][rows] = x
+            results['shear_force'][rows] = shear
+            results['bending_moment'][rows] = moment_diagram
+            results['deflection'][rows] = deflection
+    
+    logging.info(f"Batch analysis complete: {n_beams} beams, {n_stations} stations")
+    return results
+
+
+def _batch_stations(x, F0, loads):
+    """
+    Add each beam's critical stations to its evenly spaced ones.
+
+    Every row gets the same number of extra stations: its load positions and
+    uniform load ends, the left limit of each point load and one zero-shear
+    candidate per segment between those (the segment start when the shear
+    does not change sign). Padding loads only add duplicate stations.
+    """
+    P, a, w, s, e = loads
+    breaks = np.sort(np.concatenate((x[:, [0, -1]], a, s, e), axis=1), axis=1)
+    left, right = breaks[:, :-1], breaks[:, 1:]
+    
+    # Shear is linear between breaks, so its zero crossings are exact
+    shear_left = _shear_force(left, F0, loads)
+    shear_right = _shear_force(np.nextafter(right, -np.inf), F0, loads)
+    crossing = np.sign(shear_left) * np.sign(shear_right) < 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = left + (right - left) * shear_left / (shear_left - shear_right)
+    zero_shear = np.where(crossing, root, left)
+    
+    jumps = np.where(a > 0, np.nextafter(a, -np.inf), 0.0)
+    return np.sort(np.concatenate((x, breaks, zero_shear, jumps), axis=1), axis=1)
+
+
+def _locate_max_deflection(x, slope, deflection, cantilever, length, EI, F0, C0, loads, iterations=60):
+    """
+    Refine the largest deflection of every beam in the chunk at once.
+
+    Every interval where a beam's slope changes sign is bisected for the
+    zero in lockstep across the chunk, matching the root solve that
+    BeamCalculator does per beam.
+    """
+    n_beams = len(x)
+    best = np.argmax(np.abs(deflection), axis=1)
+    position = x[np.arange(n_beams), best]
+    value = np.abs(deflection[np.arange(n_beams), best])
+    
+    beam, i = np.nonzero(np.sign(slope[:, :-1]) * np.sign(slope[:, 1:]) < 0)
+    if len(beam) == 0:
+        return position, value
+    
+    # Gather each bracket's beam so all brackets are solved as one batch
+    bracket_loads = tuple(load[beam] for load in loads)
+    bracket_args = (cantilever[beam], length[beam], EI[beam], F0[beam], C0[beam], bracket_loads)
+    
+    def slope_and_deflection_at(points):
+        slope_at, deflection_at = _slope_and_deflection(points[:, np.newaxis], *bracket_args)
+        return slope_at[:, 0], deflection_at[:, 0]
+    
+    a, b = x[beam, i], x[beam, i + 1]
+    slope_a = slope[beam, i]
+    for _ in range(iterations):
+        mid = (a + b) / 2
+        slope_mid = slope_and_deflection_at(mid)[0]
+        left = np.sign(slope_mid) == np.sign(slope_a)
+        a, slope_a = np.where(left, mid, a), np.where(left, slope_mid, slope_a)
+        b = np.where(left, b, mid)
+    
+    root = (a + b) / 2
+    candidate = np.abs(slope_and_deflection_at(root)[1])
+    
+    # Keep the largest candidate of each beam where it beats the sampled maximum
+    order = np.lexsort((candidate, beam))
+    last = np.flatnonzero(np.append(np.diff(beam[order]) != 0, True))
+    beam, root, candidate = beam[order][last], root[order][last], candidate[order][last]
+    better = candidate > value[beam]
+    position[beam[better]] = root[better]
+    value[beam[better]] = candidate[better]
+    return position, value
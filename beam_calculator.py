@@ -1,14 +1,364 @@
+import io
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.integrate import quad
+from math import factorial
 import logging
 
+from instrumentation import stage
+
+# scipy and matplotlib are imported where they are used, so that importing
+# this module (and serving pages that never plot) stays cheap
+
+
+def _macaulay(x, order, P, a, w, s, e):
+    """
+    Sum the singularity (Macaulay) terms of all loads at stations x.
+
+    order=0 gives the total load to the left of each station (point loads
+    sitting exactly on a station count as left), order=1 its moment about
+    the station, and higher orders the successive integrals of that moment.
+    Load arrays may carry leading batch dimensions matching those of x.
+    """
+    x = np.asarray(x, dtype=float)
+    if x.ndim == 0:
+        return _macaulay(x[np.newaxis], order, P, a, w, s, e)[0]
+    x = x[..., np.newaxis]
+    total = np.zeros(x.shape[:-1])
+
+    # Point loads: P * <x - a>^n / n!
+    if P.shape[-1]:
+        d = x - a[..., np.newaxis, :]
+        if order == 0:
+            terms = (d >= 0).astype(float)
+        else:
+            terms = np.maximum(d, 0.0) ** order / factorial(order)
+        total = total + np.matmul(terms, P[..., np.newaxis])[..., 0]
+
+    # Uniform loads: w * (<x - start>^(n+1) - <x - end>^(n+1)) / (n+1)!
+    if w.shape[-1]:
+        k = order + 1
+        ds = np.maximum(x - s[..., np.newaxis, :], 0.0)
+        de = np.maximum(x - e[..., np.newaxis, :], 0.0)
+        terms = (ds ** k - de ** k) / factorial(k)
+        total = total + np.matmul(terms, w[..., np.newaxis])[..., 0]
+
+    return total
+
+
+def _per_station(value):
+    """Give per-beam values a trailing axis so they broadcast over stations"""
+    return np.asarray(value, dtype=float)[..., np.newaxis]
+
+
+def _load_resultants(P, a, w, s, e):
+    """Total downward load and its first moment about x=0, summed over the last axis"""
+    load_length = e - s
+    total_load = w * load_length
+    centroid = s + load_length / 2
+    total = np.sum(P, axis=-1) + np.sum(total_load, axis=-1)
+    moment = np.sum(P * a, axis=-1) + np.sum(total_load * centroid, axis=-1)
+    return total, moment
+
+
+def _cantilever_reactions(total, moment):
+    """Fixed end at x=0 carries the whole load and its moment"""
+    return {'R_y': total, 'M_fixed': moment}
+
+
+def _simply_supported_reactions(total, moment, length):
+    """Moments about the left support give the right reaction, vertical equilibrium the left"""
+    R_B = moment / length  # Right reaction
+    R_A = total - R_B  # Left reaction
+    return {'R_A': R_A, 'R_B': R_B}
+
+
+def _shear_force(x, F0, loads):
+    """
+    Shear force at stations x for a beam whose left end carries shear F0.
+
+    For a simply supported beam F0 is R_A; for a cantilever it is the fixed
+    end reaction, i.e. everything not left of x lies right of it.
+    """
+    return _per_station(F0) - _macaulay(x, 0, *loads)
+
+
+def _bending_moment(x, cantilever, F0, C0, loads):
+    """
+    Bending moment at stations x from the left-end shear F0 and sagging moment C0.
+
+    Cantilever moments keep this module's hogging-positive convention.
+    """
+    sagging = _per_station(C0) + _per_station(F0) * x - _macaulay(x, 1, *loads)
+    return np.where(_per_station(cantilever), -sagging, sagging)
+
+
+def _slope_and_deflection(x, cantilever, length, EI, F0, C0, loads):
+    """
+    Exact slope and deflection at stations x by Macaulay double integration.
+
+    EI * y'' equals the sagging moment and downward deflection is negative.
+    Cantilevers are fixed at x=0 (y = y' = 0 there); simply supported beams
+    are pinned at both ends, and y(L) = 0 sets the integration constant.
+    """
+    F0, C0, EI = _per_station(F0), _per_station(C0), _per_station(EI)
+    length, cantilever = _per_station(length), _per_station(cantilever)
+    end_terms = _macaulay(length, 3, *loads)
+    C1 = np.where(cantilever, 0.0, end_terms / length - C0 * length / 2 - F0 * length**2 / 6)
+    slope = (C0 * x + F0 * x**2 / 2 - _macaulay(x, 2, *loads) + C1) / EI
+    deflection = (C0 * x**2 / 2 + F0 * x**3 / 6 - _macaulay(x, 3, *loads) + C1 * x) / EI
+    return slope, deflection
+
+
+def _single_load(kind, load):
+    """Load arrays (P, a, w, start, end) holding just one load"""
+    values = np.array([load], dtype=float)
+    empty = np.empty(0)
+    if kind == 'point':
+        return values[:, 0], values[:, 1], empty, empty, empty
+    return empty, empty, values[:, 0], values[:, 1], values[:, 2]
+
+
+def _cumulative_trapezoid(y, x):
+    """Running trapezoidal integral of y over x, starting from zero"""
+    increments = (y[1:] + y[:-1]) / 2 * np.diff(x)
+    return np.concatenate(([0.0], np.cumsum(increments)))
+
+
+def _cumulative_simpson(x, y_start, y_mid, y_end):
+    """Running Simpson integral over stations x, given y at the start, middle and end of each interval"""
+    increments = (y_start + 4 * y_mid + y_end) / 6 * np.diff(x)
+    return np.concatenate(([0.0], np.cumsum(increments)))
+
+
+def _rigidity_at(rigidity, x):
+    """EI at stations x of a set_flexural_rigidity function or (positions, values) table"""
+    x = np.asarray(x, dtype=float)
+    if callable(rigidity):
+        return np.broadcast_to(np.asarray(rigidity(x), dtype=float), x.shape)
+    positions, values = rigidity
+    return np.interp(x, positions, values)
+
+
+class ProfileLoads:
+    """
+    Sum of piecewise linear load distributions (linear, trapezoidal and
+    sampled loads) with running integrals over their knots.
+
+    Every segment of a distribution adds a jump in intensity and a change
+    of slope at each of its ends. Sorted once, those events give the
+    intensity and slope after every event, and from them the exact load
+    and first moment up to every event; the load left of any section then
+    costs one bisection however finely the distributions are sampled.
+    """
+    
+    def __init__(self, profiles):
+        segments = []
+        for positions, intensities in profiles:
+            keep = np.diff(positions) > 0
+            segments.append((positions[:-1][keep], positions[1:][keep],
+                             intensities[:-1][keep], intensities[1:][keep]))
+        starts, ends, q_start, q_end = (np.concatenate(column) for column in zip(*segments))
+        slopes = (q_end - q_start) / (ends - starts)
+        
+        events = np.concatenate((starts, ends))
+        order = np.argsort(events, kind='stable')
+        events = events[order]
+        jumps = np.concatenate((q_start, -q_end))[order]
+        self.positions = events
+        self.slope = np.cumsum(np.concatenate((slopes, -slopes))[order])
+        
+        # Intensity just right of each event, accumulated from the jumps and
+        # the slope over the gap before it; nothing is loaded past the last one
+        gaps = np.diff(events)
+        self.intensity_after = np.cumsum(jumps + np.concatenate(([0.0], self.slope[:-1] * gaps)))
+        self.slope[-1] = self.intensity_after[-1] = 0.0
+        
+        # Exact load and first moment about x=0 up to each event
+        force, moment = self._gap_integrals(np.arange(len(events) - 1), gaps)
+        self.force = np.concatenate(([0.0], np.cumsum(force)))
+        self.moment = np.concatenate(([0.0], np.cumsum(moment)))
+    
+    def _gap_integrals(self, i, d):
+        """Load and first moment about x=0 from event i to d past it"""
+        x0, q, k = self.positions[i], self.intensity_after[i], self.slope[i]
+        force = q * d + k * d**2 / 2
+        moment = q * (x0 * d + d**2 / 2) + k * (x0 * d**2 / 2 + d**3 / 3)
+        return force, moment
+    
+    def _locate(self, x):
+        """Last event at or left of each x (clamped to 0), the distance past it and whether one exists"""
+        x = np.asarray(x, dtype=float)
+        i = np.searchsorted(self.positions, x, side='right') - 1
+        inside = i >= 0
+        i = np.maximum(i, 0)
+        return i, np.where(inside, x - self.positions[i], 0.0), inside
+    
+    def intensity(self, x):
+        """Load intensity just right of x"""
+        i, d, inside = self._locate(x)
+        return np.where(inside, self.intensity_after[i] + self.slope[i] * d, 0.0)
+    
+    def integrals(self, x):
+        """Total load acting left of x and its first moment about x=0"""
+        i, d, inside = self._locate(x)
+        force, moment = self._gap_integrals(i, d)
+        return (np.where(inside, self.force[i] + force, 0.0),
+                np.where(inside, self.moment[i] + moment, 0.0))
+    
+    def left_of(self, x):
+        """Total load acting left of x and its moment about x"""
+        force, moment = self.integrals(x)
+        return force, x * force - moment
+
+
+class LoadColumns:
+    """
+    Growable float64 storage for one kind of load, one column per field.
+
+    Each field is a contiguous row of a 2-D buffer whose capacity doubles as
+    loads are added, so columns() gives the vectorized kernels zero-copy
+    (read-only) views. Individual loads read back as tuples of floats.
+    """
+    __slots__ = ('_data', '_size')
+    
+    def __init__(self, width, capacity=8):
+        self._data = np.empty((width, capacity))
+        self._size = 0
+    
+    def __len__(self):
+        return self._size
+    
+    def _index(self, index):
+        """Normalize a possibly negative load index"""
+        if not -self._size <= index < self._size:
+            raise IndexError(f"Load index {index} out of range")
+        return index % self._size
+    
+    def __getitem__(self, index):
+        return tuple(self._data[:, self._index(index)].tolist())
+    
+    def __setitem__(self, index, row):
+        self._data[:, self._index(index)] = row
+    
+    def append(self, row):
+        self.extend(np.asarray(row, dtype=float)[:, np.newaxis])
+    
+    def extend(self, columns):
+        """Append loads given as one array per field"""
+        columns = np.asarray(columns, dtype=float)
+        count = columns.shape[1]
+        width, capacity = self._data.shape
+        if self._size + count > capacity:
+            grown = np.empty((width, max(self._size + count, 2 * capacity)))
+            grown[:, :self._size] = self._data[:, :self._size]
+            self._data = grown
+        self._data[:, self._size:self._size + count] = columns
+        self._size += count
+    
+    def pop(self, index):
+        """Remove a load, keeping the others in order, and return it"""
+        index = self._index(index)
+        row = self[index]
+        self._data[:, index:self._size - 1] = self._data[:, index + 1:self._size]
+        self._size -= 1
+        return row
+    
+    def columns(self):
+        """Read-only views of each field over the stored loads"""
+        views = tuple(self._data[i, :self._size] for i in range(self._data.shape[0]))
+        for view in views:
+            view.flags.writeable = False
+        return views
+    
+    def as_tuples(self):
+        """The loads as a tuple of tuples, in the order they were added"""
+        return tuple(zip(*(column.tolist() for column in self.columns())))
+
+
+class CompiledLoads:
+    """
+    Loads of a beam sorted by position with prefix sums of force and first
+    moment, so shear and moment at any section cost one bisection each
+    """
+    
+    def __init__(self, beam):
+        self.support_type = beam.support_type
+        self.reactions = beam.calculate_reactions()
+        self.profile = beam._profile_loads()
+        
+        P, a, w, s, e = beam.load_columns()
+        
+        # Point loads sorted by position: prefix sums of P and P*a
+        order = np.argsort(a, kind='stable')
+        P, a = P[order], a[order]
+        self.point_positions = a
+        self.point_force = np.concatenate(([0.0], np.cumsum(P)))
+        self.point_moment = np.concatenate(([0.0], np.cumsum(P * a)))
+        
+        # A uniform load is a ramp of +w starting at its start and -w starting
+        # at its end: prefix sums of w, w*s and w*s^2 over those ramp origins
+        origins = np.concatenate((s, e))
+        intensities = np.concatenate((w, -w))
+        order = np.argsort(origins, kind='stable')
+        origins, intensities = origins[order], intensities[order]
+        self.ramp_positions = origins
+        self.ramp_w = np.concatenate(([0.0], np.cumsum(intensities)))
+        self.ramp_ws = np.concatenate(([0.0], np.cumsum(intensities * origins)))
+        self.ramp_ws2 = np.concatenate(([0.0], np.cumsum(intensities * origins**2)))
+    
+    def loads_left(self, x):
+        """Total load acting at or to the left of x"""
+        i = np.searchsorted(self.point_positions, x, side='right')
+        j = np.searchsorted(self.ramp_positions, x, side='right')
+        total = self.point_force[i] + x * self.ramp_w[j] - self.ramp_ws[j]
+        if self.profile is not None:
+            total = total + self.profile.left_of(x)[0]
+        return total
+    
+    def moment_left(self, x):
+        """Moment about x of the loads acting to the left of x"""
+        i = np.searchsorted(self.point_positions, x, side='right')
+        j = np.searchsorted(self.ramp_positions, x, side='right')
+        point = x * self.point_force[i] - self.point_moment[i]
+        ramps = (x**2 * self.ramp_w[j] - 2 * x * self.ramp_ws[j] + self.ramp_ws2[j]) / 2
+        if self.profile is not None:
+            ramps = ramps + self.profile.left_of(x)[1]
+        return point + ramps
+    
+    def shear_force(self, x):
+        """Shear force at x (scalar or array)"""
+        x = np.asarray(x, dtype=float)
+        if self.support_type == 'cantilever':
+            return self.reactions['R_y'] - self.loads_left(x)
+        return self.reactions['R_A'] - self.loads_left(x)
+    
+    def bending_moment(self, x):
+        """Bending moment at x (scalar or array)"""
+        x = np.asarray(x, dtype=float)
+        if self.support_type == 'cantilever':
+            return self.reactions['M_fixed'] - self.reactions['R_y'] * x + self.moment_left(x)
+        return self.reactions['R_A'] * x - self.moment_left(x)
+
+
 class BeamCalculator:
     """
     Beam Bending Calculator and Visualizer
     Supports cantilever and simply supported beams with point and distributed loads
+    
+    Uniform loads on a constant EI are solved in closed form. Linear and
+    sampled loads, or an EI that varies along the beam, switch deflection
+    to cumulative quadrature of M/EI over the analysis stations.
     """
     
+    # Statically determinate: each load's share of the results does not depend
+    # on the other loads, so edits after calculate() are applied by superposition
+    incremental = True
+    
+    __slots__ = ('L', 'E', 'I', 'EI', 'support_type', '_point', '_distributed',
+                 'x_points', 'shear_force', 'bending_moment', 'deflection', 'slope',
+                 'max_deflection', 'max_deflection_position', 'support_slopes',
+                 'max_moment', 'max_shear', '_n_stations', '_compile_enabled', '_compiled',
+                 '_profiles', '_profile_model', '_rigidity', '_deflection_grid')
+    
     def __init__(self, length, young_modulus, moment_inertia, support_type='simply_supported'):
         self.L = length  # Beam length
         self.E = young_modulus  # Young's modulus
@@ -17,24 +367,64 @@ class BeamCalculator:
         self.support_type = support_type
         
         # Load storage
-        self.point_loads = []  # [(magnitude, position)]
-        self.distributed_loads = []  # [(magnitude, start_pos, end_pos)]
+        self._point = LoadColumns(2)  # magnitude, position
+        self._distributed = LoadColumns(3)  # magnitude, start_pos, end_pos
+        self._profiles = []  # (positions, intensities) of piecewise linear loads
+        self._profile_model = None
+        
+        # EI(x): None for a prismatic beam, else a function or (positions, values) table
+        self._rigidity = None
+        self._deflection_grid = None
         
         # Results storage
         self.x_points = None
         self.shear_force = None
         self.bending_moment = None
         self.deflection = None
+        self.slope = None
         self.max_deflection = None
+        self.max_deflection_position = None
+        self.support_slopes = None
         self.max_moment = None
         self.max_shear = None
+        self._n_stations = 201
+        
+        # Compiled load model, rebuilt lazily after loads change once compile() was called
+        self._compile_enabled = False
+        self._compiled = None
         
         logging.info(f"Beam initialized: L={length}, E={young_modulus}, I={moment_inertia}, Support={support_type}")
     
+    def empty_copy(self):
+        """A calculator for the same beam and supports with no loads"""
+        copy = BeamCalculator(self.L, self.E, self.I, self.support_type)
+        copy._rigidity = self._rigidity
+        return copy
+    
+    @property
+    def point_loads(self):
+        """Point loads as a read-only tuple of (magnitude, position)"""
+        return self._point.as_tuples()
+    
+    @property
+    def distributed_loads(self):
+        """Distributed loads as a read-only tuple of (magnitude, start_pos, end_pos)"""
+        return self._distributed.as_tuples()
+    
+    @property
+    def profile_loads(self):
+        """Linear and sampled loads as a read-only tuple of (positions, intensities) arrays"""
+        return tuple(self._profiles)
+    
+    def load_columns(self):
+        """Stored point and uniform loads as zero-copy read-only arrays (P, a, w, start, end)"""
+        return self._point.columns() + self._distributed.columns()
+    
     def add_point_load(self, magnitude, position):
         """Add a point load to the beam"""
         if 0 <= position <= self.L:
-            self.point_loads.append((magnitude, position))
+            self._point.append((magnitude, position))
+            self._loads_changed(added=('point', (magnitude, position)))
             logging.info(f"Added point load: {magnitude}N at {position}m")
         else:
             raise ValueError(f"Point load position {position} is outside beam length {self.L}")
@@ -43,70 +433,273 @@ class BeamCalculator:
         """Add a uniformly distributed load to the beam"""
         end_pos = start_pos + length
         if 0 <= start_pos <= self.L and 0 <= end_pos <= self.L:
-            self.distributed_loads.append((magnitude, start_pos, end_pos))
+            self._distributed.append((magnitude, start_pos, end_pos))
+            self._loads_changed(added=('distributed', (magnitude, start_pos, end_pos)))
             logging.info(f"Added distributed load: {magnitude}N/m from {start_pos}m to {end_pos}m")
         else:
             raise ValueError(f"Distributed load extends outside beam length")
     
+    def add_linear_load(self, start_magnitude, end_magnitude, start_pos, length):
+        """Add a load varying linearly from start_magnitude to end_magnitude (N/m): triangular or trapezoidal"""
+        end_pos = start_pos + length
+        if not (0 <= start_pos <= self.L and 0 <= end_pos <= self.L and length > 0):
+            raise ValueError(f"Linear load extends outside beam length")
+        self._add_profile([start_pos, end_pos], [start_magnitude, end_magnitude])
+        logging.info(f"Added linear load: {start_magnitude}N/m at {start_pos}m to {end_magnitude}N/m at {end_pos}m")
+    
+    def add_sampled_load(self, positions, magnitudes):
+        """
+        Add a load distribution sampled at increasing positions (N/m), linear
+        between samples and zero outside them. Repeating a position gives a
+        step in intensity there.
+        """
+        positions = np.array(positions, dtype=float)
+        magnitudes = np.array(magnitudes, dtype=float)
+        if positions.ndim != 1 or positions.shape != magnitudes.shape or len(positions) < 2:
+            raise ValueError("A sampled load needs matching positions and magnitudes, at least two of each")
+        if np.any(np.diff(positions) < 0) or positions[-1] <= positions[0]:
+            raise ValueError("Sampled load positions must increase along the beam")
+        if positions[0] < 0 or positions[-1] > self.L:
+            raise ValueError(f"Sampled load extends outside beam length")
+        self._add_profile(positions, magnitudes)
+        logging.info(f"Added sampled load: {len(positions)} samples from {positions[0]}m to {positions[-1]}m")
+    
+    def _add_profile(self, positions, intensities):
+        """Store a piecewise linear load as read-only arrays"""
+        profile = tuple(np.array(values, dtype=float) for values in (positions, intensities))
+        for values in profile:
+            values.flags.writeable = False
+        self._profiles.append(profile)
+        self._loads_changed()
+    
+    def set_flexural_rigidity(self, rigidity):
+        """
+        Let EI vary along the beam, for tapered or stepped members.
+
+        rigidity is a function of position accepting an array, or a table
+        (positions, EI values) interpolated linearly and held constant past
+        its ends; repeating a position gives a step. None restores the
+        constant E * I.
+        """
+        if rigidity is not None:
+            if not callable(rigidity):
+                positions, values = (np.array(column, dtype=float) for column in rigidity)
+                if positions.ndim != 1 or positions.shape != values.shape or not len(positions):
+                    raise ValueError("An EI table needs matching positions and values")
+                if np.any(np.diff(positions) < 0):
+                    raise ValueError("EI table positions must increase along the beam")
+                rigidity = (positions, values)
+            # Checked before it is stored, so a rejected EI leaves the beam as it was
+            if np.any(_rigidity_at(rigidity, np.linspace(0, self.L, 101)) <= 0):
+                raise ValueError("Flexural rigidity must be positive along the whole beam")
+        self._rigidity = rigidity
+        self._loads_changed()
+        logging.info(f"Flexural rigidity: {'variable' if rigidity is not None else 'constant'}")
+    
+    def flexural_rigidity(self, x):
+        """EI at stations x"""
+        x = np.asarray(x, dtype=float)
+        if self._rigidity is None:
+            return np.full(x.shape, float(self.EI))
+        return _rigidity_at(self._rigidity, x)
+    
+    @property
+    def rigidity(self):
+        """EI(x) as given to set_flexural_rigidity, or None when EI is constant"""
+        return self._rigidity
+    
+    @property
+    def prismatic(self):
+        """Whether EI is constant along the beam"""
+        return self._rigidity is None
+    
+    def _uses_quadrature(self):
+        """Whether deflection has to be integrated numerically: linear or sampled loads, or a varying EI"""
+        return bool(self._profiles) or not self.prismatic
+    
+    def _profile_loads(self):
+        """The linear and sampled loads as a ProfileLoads model, or None when there are none"""
+        if self._profile_model is None and self._profiles:
+            self._profile_model = ProfileLoads(self._profiles)
+        return self._profile_model
+    
+    def update_point_load(self, index, magnitude, position):
+        """Replace the index-th point load"""
+        if not 0 <= position <= self.L:
+            raise ValueError(f"Point load position {position} is outside beam length {self.L}")
+        old = self._point[index]
+        self._point[index] = (magnitude, position)
+        self._loads_changed(removed=('point', old), added=('point', (magnitude, position)))
+        logging.info(f"Updated point load {index}: {magnitude}N at {position}m")
+    
+    def update_distributed_load(self, index, magnitude, start_pos, length):
+        """Replace the index-th distributed load"""
+        end_pos = start_pos + length
+        if not (0 <= start_pos <= self.L and 0 <= end_pos <= self.L):
+            raise ValueError(f"Distributed load extends outside beam length")
+        old = self._distributed[index]
+        self._distributed[index] = (magnitude, start_pos, end_pos)
+        self._loads_changed(removed=('distributed', old), added=('distributed', (magnitude, start_pos, end_pos)))
+        logging.info(f"Updated distributed load {index}: {magnitude}N/m from {start_pos}m to {end_pos}m")
+    
+    def remove_load(self, kind, index):
+        """Remove the index-th load of a kind ('point', 'distributed' or 'profile')"""
+        if kind == 'point':
+            old = self._point.pop(index)
+        elif kind == 'distributed':
+            old = self._distributed.pop(index)
+        elif kind == 'profile':
+            self._profiles.pop(index)
+            old = None
+        else:
+            raise ValueError(f"Unknown load type: {kind}")
+        self._loads_changed(removed=(kind, old) if old is not None else None)
+        logging.info(f"Removed {kind} load {index}")
+    
+    def add_point_loads(self, magnitudes, positions):
+        """Add many point loads in one call from equal-length arrays"""
+        magnitudes, positions = (np.ravel(values) for values in
+                                 np.broadcast_arrays(np.asarray(magnitudes, dtype=float),
+                                                     np.asarray(positions, dtype=float)))
+        outside = (positions < 0) | (positions > self.L)
+        if np.any(outside):
+            raise ValueError(f"Point load position {positions[outside][0]} is outside beam length {self.L}")
+        self._point.extend((magnitudes, positions))
+        self._loads_changed()
+        logging.info(f"Added {len(magnitudes)} point loads")
+    
+    def add_distributed_loads(self, magnitudes, starts, lengths):
+        """Add many distributed loads in one call from equal-length arrays"""
+        magnitudes, starts, lengths = (np.ravel(values) for values in
+                                       np.broadcast_arrays(np.asarray(magnitudes, dtype=float),
+                                                           np.asarray(starts, dtype=float),
+                                                           np.asarray(lengths, dtype=float)))
+        ends = starts + lengths
+        if np.any((starts < 0) | (starts > self.L) | (ends < 0) | (ends > self.L)):
+            raise ValueError(f"Distributed load extends outside beam length")
+        self._distributed.extend((magnitudes, starts, ends))
+        self._loads_changed()
+        logging.info(f"Added {len(magnitudes)} distributed loads")
+    
+    def load_csv(self, source):
+        """
+        Add loads from CSV with the input form's columns: type, magnitude,
+        position and (for distributed and linear loads) length, plus
+        end_magnitude for linear loads. source is a path or an open text
+        file; returns the number of loads added.
+        """
+        import csv
+        if isinstance(source, str):
+            with open(source, newline='') as f:
+                return self.load_csv(f)
+        
+        point, distributed, linear = [], [], []
+        for line, row in enumerate(csv.DictReader(source), start=2):
+            try:
+                kind = row['type'].strip()
+                if kind == 'point':
+                    point.append((float(row['magnitude']), float(row['position'])))
+                elif kind == 'distributed':
+                    distributed.append((float(row['magnitude']), float(row['position']), float(row['length'])))
+                elif kind == 'linear':
+                    linear.append((float(row['magnitude']), float(row['end_magnitude']),
+                                   float(row['position']), float(row['length'])))
+                else:
+                    raise ValueError(f"unknown load type {kind!r}")
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid load on CSV line {line}: {e}")
+        
+        if point:
+            self.add_point_loads(*np.array(point).T)
+        if distributed:
+            self.add_distributed_loads(*np.array(distributed).T)
+        for load in linear:
+            self.add_linear_load(*load)
+        return len(point) + len(distributed) + len(linear)
+    
+    def _loads_changed(self, removed=None, added=None):
+        """
+        Bring cached models and the last calculate() results up to date after
+        the loads changed.
+
+        When one load was added, removed (or both, for an edit) results are
+        updated by superposition on the existing stations if the beam
+        supports it and is solved in closed form; other changes recalculate.
+        """
+        self._compiled = None
+        self._profile_model = None
+        self._deflection_grid = None
+        if self.deflection is None:
+            return
+        if self.incremental and not self._uses_quadrature() and (removed is not None or added is not None):
+            self._update_results(removed, added)
+        else:
+            self.calculate(self._n_stations)
+    
+    def compile(self):
+        """
+        Switch point queries to a compiled load model.
+
+        Loads are sorted once and calculate_shear_force / calculate_bending_moment
+        then cost O(log n) per section instead of a scan over every load. The
+        model is rebuilt on the next query whenever a load is added.
+        """
+        self._compile_enabled = True
+        return self._compiled_loads()
+    
+    def _compiled_loads(self):
+        """Return the compiled load model, or None when compile() has not been called"""
+        if not self._compile_enabled:
+            return None
+        if self._compiled is None:
+            self._compiled = CompiledLoads(self)
+        return self._compiled
+    
     def calculate_reactions(self):
         """Calculate support reactions based on equilibrium"""
-        if self.support_type == 'cantilever':
-            # For cantilever beam, reactions are at the fixed end (x=0)
-            return self._calculate_cantilever_reactions()
-        elif self.support_type == 'simply_supported':
-            # For simply supported beam, reactions are at both ends
-            return self._calculate_simply_supported_reactions()
-        else:
-            raise ValueError(f"Unsupported beam type: {self.support_type}")
+        with stage('reactions'):
+            if self.support_type == 'cantilever':
+                # For cantilever beam, reactions are at the fixed end (x=0)
+                return self._calculate_cantilever_reactions()
+            elif self.support_type == 'simply_supported':
+                # For simply supported beam, reactions are at both ends
+                return self._calculate_simply_supported_reactions()
+            else:
+                raise ValueError(f"Unsupported beam type: {self.support_type}")
+    
+    def _resultants(self):
+        """Total load and its first moment about x=0, including linear and sampled loads"""
+        total, moment = _load_resultants(*self._load_arrays())
+        profile = self._profile_loads()
+        if profile is not None:
+            profile_total, profile_moment = profile.integrals(self.L)
+            total, moment = total + profile_total, moment + profile_moment
+        return total, moment
     
     def _calculate_cantilever_reactions(self):
         """Calculate reactions for cantilever beam (fixed at x=0)"""
-        # Sum of vertical forces
-        R_y = 0
-        # Sum of moments about fixed end
-        M_fixed = 0
-        
-        # Point loads
-        for P, a in self.point_loads:
-            R_y += P
-            M_fixed += P * a
-        
-        # Distributed loads
-        for w, start, end in self.distributed_loads:
-            load_length = end - start
-            total_load = w * load_length
-            centroid = start + load_length / 2
-            R_y += total_load
-            M_fixed += total_load * centroid
-        
-        return {'R_y': R_y, 'M_fixed': M_fixed}
+        total, moment = self._resultants()
+        reactions = _cantilever_reactions(total, moment)
+        return {name: float(value) for name, value in reactions.items()}
     
     def _calculate_simply_supported_reactions(self):
         """Calculate reactions for simply supported beam"""
-        # Sum of moments about left support (x=0) to find right reaction
-        moment_sum = 0
-        total_vertical_load = 0
-        
-        # Point loads
-        for P, a in self.point_loads:
-            moment_sum += P * a
-            total_vertical_load += P
-        
-        # Distributed loads
-        for w, start, end in self.distributed_loads:
-            load_length = end - start
-            total_load = w * load_length
-            centroid = start + load_length / 2
-            moment_sum += total_load * centroid
-            total_vertical_load += total_load
-        
-        R_B = moment_sum / self.L  # Right reaction
-        R_A = total_vertical_load - R_B  # Left reaction
-        
-        return {'R_A': R_A, 'R_B': R_B}
+        total, moment = self._resultants()
+        reactions = _simply_supported_reactions(total, moment, self.L)
+        return {name: float(value) for name, value in reactions.items()}
+    
+    def _end_actions(self):
+        """Shear and sagging moment just inside the left end, from the reactions"""
+        reactions = self.calculate_reactions()
+        if self.support_type == 'cantilever':
+            return reactions['R_y'], -reactions['M_fixed']
+        return reactions['R_A'], 0.0
     
     def calculate_shear_force(self, x):
         """Calculate shear force at position x"""
+        compiled = self._compiled_loads()
+        if compiled is not None:
+            return float(compiled.shear_force(x))
         if self.support_type == 'cantilever':
             return self._cantilever_shear_force(x)
         else:
@@ -126,10 +719,15 @@ class BeamCalculator:
             if start > x:
                 # Entire load to the right
                 V += w * (end - start)
-            elif end > x > start:
+            elif end > x >= start:
                 # Partial load to the right
                 V += w * (end - x)
         
+        # Linear and sampled loads to the right of section
+        profile = self._profile_loads()
+        if profile is not None:
+            V += float(profile.left_of(self.L)[0] - profile.left_of(x)[0])
+        
         return V
     
     def _simply_supported_shear_force(self, x):
@@ -151,10 +749,18 @@ class BeamCalculator:
                 # Partial load to the left
                 V -= w * (x - start)
         
+        # Linear and sampled loads to the left of section
+        profile = self._profile_loads()
+        if profile is not None:
+            V -= float(profile.left_of(x)[0])
+        
         return V
     
     def calculate_bending_moment(self, x):
         """Calculate bending moment at position x"""
+        compiled = self._compiled_loads()
+        if compiled is not None:
+            return float(compiled.bending_moment(x))
         if self.support_type == 'cantilever':
             return self._cantilever_bending_moment(x)
         else:
@@ -176,12 +782,19 @@ class BeamCalculator:
                 load_magnitude = w * (end - start)
                 centroid_distance = (start + end) / 2 - x
                 M += load_magnitude * centroid_distance
-            elif end > x > start:
+            elif end > x >= start:
                 # Partial load to the right
                 load_magnitude = w * (end - x)
                 centroid_distance = (x + end) / 2 - x
                 M += load_magnitude * centroid_distance
         
+        # Linear and sampled loads to the right of section
+        profile = self._profile_loads()
+        if profile is not None:
+            total, moment = profile.integrals(self.L)
+            left, left_moment = profile.integrals(x)
+            M += float((moment - left_moment) - x * (total - left))
+        
         return M
     
     def _simply_supported_bending_moment(self, x):
@@ -207,169 +820,445 @@ class BeamCalculator:
                 centroid_distance = (x - start) / 2
                 M -= load_magnitude * centroid_distance
         
+        # Linear and sampled loads to the left of section
+        profile = self._profile_loads()
+        if profile is not None:
+            M -= float(profile.left_of(x)[1])
+        
         return M
     
-    def calculate_deflection(self):
-        """Calculate deflection using the moment-area method"""
-        # This is a simplified implementation
-        # In practice, more sophisticated methods would be used
-        n_points = 1000
-        x = np.linspace(0, self.L, n_points)
-        
-        # Calculate moments at all points
-        moments = np.array([self.calculate_bending_moment(xi) for xi in x])
+    def _load_arrays(self):
+        """Return loads as arrays (P, a, w, start, end) for the vectorized engine"""
+        return self.load_columns()
+    
+    def shear_force_array(self, x):
+        """Calculate shear force at every station in x in one vectorized pass"""
+        x = np.asarray(x, dtype=float)
+        compiled = self._compiled_loads()
+        if compiled is not None:
+            return compiled.shear_force(x)
+        F0, C0 = self._end_actions()
+        shear = _shear_force(x, F0, self._load_arrays())
+        profile = self._profile_loads()
+        if profile is not None:
+            shear = shear - profile.left_of(x)[0]
+        return shear
+    
+    def bending_moment_array(self, x):
+        """Calculate bending moment at every station in x in one vectorized pass"""
+        x = np.asarray(x, dtype=float)
+        compiled = self._compiled_loads()
+        if compiled is not None:
+            return compiled.bending_moment(x)
+        F0, C0 = self._end_actions()
+        cantilever = self.support_type == 'cantilever'
+        moment = _bending_moment(x, cantilever, F0, C0, self._load_arrays())
+        profile = self._profile_loads()
+        if profile is not None:
+            # Remove the sagging moment of the loads left of x (hogging-positive for cantilevers)
+            left_moment = profile.left_of(x)[1]
+            moment = moment + left_moment if cantilever else moment - left_moment
+        return moment
+    
+    def slope_and_deflection_array(self, x):
+        """
+        Calculate slope and deflection at stations x: exactly by Macaulay
+        double integration, or by quadrature when the loads or EI need it
+        """
+        x = np.asarray(x, dtype=float)
+        if x.ndim == 0:
+            slope, deflection = self.slope_and_deflection_array(x[np.newaxis])
+            return slope[0], deflection[0]
+        if self._uses_quadrature():
+            return self._quadrature_slope_and_deflection(x)
+        F0, C0 = self._end_actions()
+        return _slope_and_deflection(x, self.support_type == 'cantilever', self.L, self.EI,
+                                     F0, C0, self._load_arrays())
+    
+    def _curvature(self, x, left=False):
+        """Sagging moment over EI at stations x, or just left of them where EI steps"""
+        moment = self.bending_moment_array(x)
+        if self.support_type == 'cantilever':
+            moment = -moment
+        return moment / self.flexural_rigidity(np.nextafter(x, -np.inf) if left else x)
+    
+    def _quadrature_grid(self):
+        """
+        Curvature, slope and deflection at the analysis stations by
+        cumulative Simpson quadrature, cached until the loads or EI change.
+
+        y(x) = integral of (x - t) * M(t) / EI(t) from 0 to x, plus a rigid
+        rotation fitting the supports. Every load end, point load and EI
+        table knot is a station, so M / EI is smooth within each interval
+        and the rule converges at fourth order.
+        """
+        if self._deflection_grid is None or self._deflection_grid[0] != self._n_stations:
+            x = self.analysis_stations(self._n_stations)
+            mid = (x[:-1] + x[1:]) / 2
+            curvature, curvature_mid = self._curvature(x), self._curvature(mid)
+            curvature_end = self._curvature(x[1:], left=True)
+            slope = _cumulative_simpson(x, curvature[:-1], curvature_mid, curvature_end)
+            deflection = x * slope - _cumulative_simpson(x, x[:-1] * curvature[:-1], mid * curvature_mid,
+                                                         x[1:] * curvature_end)
+            if self.support_type != 'cantilever':
+                # Pinned at both ends: rotate so the right support does not move
+                rotation = -deflection[-1] / self.L
+                slope, deflection = slope + rotation, deflection + rotation * x
+            self._deflection_grid = (self._n_stations, x, curvature, slope, deflection)
+        return self._deflection_grid[1:]
+    
+    def _quadrature_slope_and_deflection(self, x):
+        """Slope and deflection at any x from the nearest quadrature station to its left"""
+        grid, curvature, slope, deflection = self._quadrature_grid()
+        i = np.clip(np.searchsorted(grid, x, side='right') - 1, 0, len(grid) - 2)
+        d = x - grid[i]
+        curvature_mid, curvature_x = self._curvature(grid[i] + d / 2), self._curvature(x, left=True)
+        # Simpson over the partial interval, for the curvature and for (x - t) times it
+        return (slope[i] + d / 6 * (curvature[i] + 4 * curvature_mid + curvature_x),
+                deflection[i] + slope[i] * d + d**2 / 6 * (curvature[i] + 2 * curvature_mid))
+    
+    def calculate_deflection(self, x=None, method='exact'):
+        """
+        Calculate deflection at stations x (defaults to the analysis stations).
+
+        method='exact' integrates the Macaulay expressions analytically, or
+        by quadrature for linear or sampled loads and a varying EI;
+        method='numerical' integrates the sampled moment diagram with
+        trapezoids instead and works for any load shape.
+        """
+        if x is None:
+            x = self.x_points if self.x_points is not None else self.analysis_stations()
+        x = np.asarray(x, dtype=float)
         
-        # Numerical integration for deflection
-        # EI * d²y/dx² = M(x)
-        # Double integration to get deflection
+        if method == 'exact':
+            slope, deflection = self.slope_and_deflection_array(x)
+        elif method == 'numerical':
+            slope, deflection = self._integrate_deflection(x, self.bending_moment_array(x))
+        else:
+            raise ValueError(f"Unknown deflection method: {method}")
         
+        self.slope = slope
+        return x, deflection
+    
+    def _integrate_deflection(self, x, moments):
+        """Integrate EI * y'' = M twice with cumulative trapezoids and apply support conditions"""
         if self.support_type == 'cantilever':
             # For cantilever: y(0) = 0, dy/dx(0) = 0
-            deflection = np.zeros_like(x)
-            for i in range(1, len(x)):
-                dx = x[i] - x[i-1]
-                # Simple numerical integration
-                deflection[i] = deflection[i-1] + (moments[i] * dx**2) / (2 * self.EI)
+            slope = _cumulative_trapezoid(-moments / self.flexural_rigidity(x), x)
+            deflection = _cumulative_trapezoid(slope, x)
         else:
-            # For simply supported: y(0) = 0, y(L) = 0
-            # Use more sophisticated integration with boundary conditions
-            deflection = self._calculate_simply_supported_deflection(x, moments)
-        
-        return x, deflection
+            slope, deflection = self._calculate_simply_supported_deflection(x, moments)
+        return slope, deflection
     
     def _calculate_simply_supported_deflection(self, x, moments):
-        """Calculate deflection for simply supported beam using conjugate beam method"""
-        # Simplified calculation - in practice, use more accurate methods
-        deflection = np.zeros_like(x)
-        dx = x[1] - x[0]
+        """Calculate slope and deflection for simply supported beam: y(0) = 0, y(L) = 0"""
+        slope = _cumulative_trapezoid(moments / self.flexural_rigidity(x), x)
+        deflection = _cumulative_trapezoid(slope, x)
+        
+        # A constant added to the slope adds a linear term to the deflection;
+        # choose it so the right support does not move
+        correction = -deflection[-1] / (x[-1] - x[0])
+        return slope + correction, deflection + correction * (x - x[0])
+    
+    def _locate_max_deflection(self, x, slope, deflection):
+        """Find the exact position and value of the largest deflection magnitude"""
+        from scipy.optimize import brentq
+        
+        best = int(np.argmax(np.abs(deflection)))
+        position, value = x[best], abs(deflection[best])
+        
+        # Interior extrema sit where the slope changes sign between stations;
+        # solve the closed-form slope for them instead of sampling more finely.
+        # The sampled slope only nominates brackets: where it is rounding
+        # noise (cancelling loads, superposed edits) its signs can disagree
+        # with the slope brentq evaluates at the ends, and brentq refuses
+        # such a bracket; the sampled maximum then stands for it.
+        slope_at = lambda xi: self.slope_and_deflection_array(xi)[0]
+        crossings = np.nonzero(np.sign(slope[:-1]) * np.sign(slope[1:]) < 0)[0]
+        for i in crossings:
+            try:
+                root = brentq(slope_at, x[i], x[i + 1], xtol=1e-12 * self.L)
+            except ValueError:
+                continue
+            candidate = abs(self.slope_and_deflection_array(root)[1])
+            if candidate > value:
+                position, value = root, candidate
+        
+        return float(position), float(value)
+    
+    def analysis_stations(self, n_stations=201):
+        """
+        Stations at which calculate() evaluates the beam.
+
+        Always includes the supports, every load position and distributed
+        load end, the knots of a tabulated EI, the left limit just before
+        each point load (so both sides of a shear jump are sampled), every
+        zero-shear point where the moment peaks and, under linear or sampled
+        loads, every point where the load intensity crosses zero and the
+        shear peaks. Between those, stations are
+        spaced L/(n_stations-1) apart under distributed loads, where the
+        moment diagram is curved, and four times wider elsewhere, where only
+        the deflection curve needs drawing.
+        """
+        P, a, w, s, e = self._load_arrays()
+        spans = np.array([(positions[0], positions[-1]) for positions, intensities in self._profiles
+                          if np.any(intensities != 0)]).reshape(-1, 2)
+        knots = self._rigidity[0] if isinstance(self._rigidity, tuple) else np.empty(0)
+        knots = knots[(knots > 0) & (knots < self.L)]
+        breaks = np.unique(np.concatenate(([0.0, self.L], a, s, e, spans.ravel(), knots)))
+        left, right = breaks[:-1], breaks[1:]
+        
+        # A segment is loaded when a nonzero distributed load covers its midpoint
+        loaded_starts = np.sort(np.concatenate((s[w != 0], spans[:, 0])))
+        loaded_ends = np.sort(np.concatenate((e[w != 0], spans[:, 1])))
+        mid = (left + right) / 2
+        loaded = (np.searchsorted(loaded_starts, mid, side='right')
+                  > np.searchsorted(loaded_ends, mid, side='right'))
+        
+        # Evenly subdivide each segment at its spacing
+        spacing = np.where(loaded, 1.0, 4.0) * self.L / (n_stations - 1)
+        divisions = np.maximum(np.ceil((right - left) / spacing).astype(int), 1)
+        segment = np.repeat(np.arange(len(left)), divisions - 1)
+        first = np.cumsum(divisions - 1) - (divisions - 1)
+        step = np.arange(len(segment)) - np.repeat(first, divisions - 1) + 1
+        interior = left[segment] + (right - left)[segment] * step / divisions[segment]
         
-        # First integration for slope
-        slope = np.zeros_like(x)
-        for i in range(1, len(x)):
-            slope[i] = slope[i-1] + (moments[i] * dx) / self.EI
+        # Left limits of the shear jumps at point loads
+        jumps = np.nextafter(a[a > 0], -np.inf)
         
-        # Apply boundary condition for simply supported beam
-        # Adjust slope to satisfy y(L) = 0
-        slope_correction = -slope[-1] / self.L
-        slope += slope_correction * x
+        profile = self._profile_loads()
+        if profile is not None:
+            zero_shear = self._profile_zero_shear(np.unique(np.concatenate((breaks, interior))), profile)
+            zero_load = self._profile_zero_intensity(profile)
+            return np.unique(np.concatenate((breaks, interior, zero_shear, zero_load, jumps)))
         
-        # Second integration for deflection
-        for i in range(1, len(x)):
-            deflection[i] = deflection[i-1] + slope[i] * dx
+        # Shear is linear within a segment, so its zero crossings are exact
+        before_right = np.nextafter(right, -np.inf)
+        shear_left = self.shear_force_array(left)
+        shear_right = self.shear_force_array(before_right)
+        crossing = np.sign(shear_left) * np.sign(shear_right) < 0
+        shear_left, shear_right = shear_left[crossing], shear_right[crossing]
+        zero_shear = left[crossing] + (right - left)[crossing] * shear_left / (shear_left - shear_right)
         
-        return deflection
+        return np.unique(np.concatenate((breaks, interior, zero_shear, jumps)))
     
-    def calculate(self):
+    def _profile_zero_shear(self, x, profile):
+        """
+        Zero-shear points between neighbouring stations x when linear or
+        sampled loads make the shear curved: a secant estimate refined by
+        Newton steps, since the shear falls at the load intensity.
+        """
+        left, right = x[:-1], x[1:]
+        shear_left = self.shear_force_array(left)
+        shear_right = self.shear_force_array(np.nextafter(right, -np.inf))
+        crossing = np.sign(shear_left) * np.sign(shear_right) < 0
+        left, right = left[crossing], right[crossing]
+        shear_left, shear_right = shear_left[crossing], shear_right[crossing]
+        root = left + (right - left) * shear_left / (shear_left - shear_right)
+        for _ in range(4):
+            intensity = self._total_intensity(root, profile)
+            shear = self.shear_force_array(root)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = np.where(intensity != 0, shear / intensity, 0.0)
+            root = np.clip(root + step, left, np.nextafter(right, -np.inf))
+        return root
+    
+    def _total_intensity(self, x, profile):
+        """Distributed load intensity just right of x, from linear, sampled and uniform loads"""
+        P, a, w, s, e = self._load_arrays()
+        covered = (s <= x[:, np.newaxis]) & (x[:, np.newaxis] < e)
+        return profile.intensity(x) + covered.astype(float) @ w
+    
+    def _profile_zero_intensity(self, profile):
+        """
+        Points where the load intensity crosses zero, so the shear peaks.
+        Between the knots of the linear and sampled loads and the ends of
+        the uniform ones the intensity is linear, so each root is exact.
+        """
+        P, a, w, s, e = self._load_arrays()
+        events = np.unique(np.clip(np.concatenate((profile.positions, s, e)), 0.0, self.L))
+        left, right = events[:-1], events[1:]
+        q_left = self._total_intensity(left, profile)
+        q_right = self._total_intensity(np.nextafter(right, -np.inf), profile)
+        crossing = (np.sign(q_left) * np.sign(q_right) <= 0) & (q_left != q_right)
+        q_left, q_right = q_left[crossing], q_right[crossing]
+        return left[crossing] + (right - left)[crossing] * q_left / (q_left - q_right)
+    
+    def _load_contribution(self, x, kind, load):
+        """Shear, moment, slope and deflection at stations x due to one load alone"""
+        loads = _single_load(kind, load)
+        total, moment = _load_resultants(*loads)
+        cantilever = self.support_type == 'cantilever'
+        if cantilever:
+            F0, C0 = total, -moment
+        else:
+            F0, C0 = _simply_supported_reactions(total, moment, self.L)['R_A'], 0.0
+        slope, deflection = _slope_and_deflection(x, cantilever, self.L, self.EI, F0, C0, loads)
+        return (_shear_force(x, F0, loads), _bending_moment(x, cantilever, F0, C0, loads),
+                slope, deflection)
+    
+    def _update_results(self, removed, added):
+        """
+        Apply one load change to the results of the last calculate().
+
+        The removed load's contribution is subtracted and the added one's
+        added at every station, which costs O(stations) whatever the number
+        of loads. The added load's break points and any new zero-shear points
+        are inserted as extra stations and evaluated in full, so jumps and
+        moment peaks stay exact; calculate() resamples from scratch.
+        """
+        with stage('incremental'):
+            for sign, change in ((-1.0, removed), (1.0, added)):
+                if change is None:
+                    continue
+                V, M, slope, deflection = self._load_contribution(self.x_points, *change)
+                self.shear_force = self.shear_force + sign * V
+                self.bending_moment = self.bending_moment + sign * M
+                self.slope = self.slope + sign * slope
+                self.deflection = self.deflection + sign * deflection
+            
+            if added is not None:
+                kind, load = added
+                if kind == 'point':
+                    breaks = [load[1], np.nextafter(load[1], -np.inf)] if load[1] > 0 else [load[1]]
+                else:
+                    breaks = list(load[1:])
+                self._insert_stations(np.array(breaks, dtype=float))
+            
+            # Shear is linear between neighbouring stations now that every
+            # load break is one, so its zero crossings are exact
+            x, V = self.x_points, self.shear_force
+            crossing = np.nonzero(np.sign(V[:-1]) * np.sign(V[1:]) < 0)[0]
+            zero_shear = x[crossing] + (x[crossing + 1] - x[crossing]) * V[crossing] / (V[crossing] - V[crossing + 1])
+            self._insert_stations(zero_shear)
+            
+            # The superposed slope carries rounding drift, so its sign can
+            # disagree with the slope itself; re-evaluate it on both sides of
+            # each sign change before those stations bracket a deflection peak
+            x, slope = self.x_points, self.slope
+            flips = np.nonzero(np.sign(slope[:-1]) * np.sign(slope[1:]) < 0)[0]
+            if len(flips):
+                ends = np.union1d(flips, flips + 1)
+                slope = slope.copy()
+                slope[ends] = self.slope_and_deflection_array(x[ends])[0]
+                self.slope = slope
+            
+            self.max_deflection_position, self.max_deflection = self._locate_max_deflection(
+                self.x_points, self.slope, self.deflection)
+            self._update_extremes()
+    
+    def _insert_stations(self, new):
+        """Add stations not already present, evaluating all loads at just those"""
+        new = np.unique(new[(new >= 0) & (new <= self.L)])
+        new = new[~np.isin(new, self.x_points)]
+        if not len(new):
+            return
+        where = np.searchsorted(self.x_points, new)
+        slope, deflection = self.slope_and_deflection_array(new)
+        self.shear_force = np.insert(self.shear_force, where, self.shear_force_array(new))
+        self.bending_moment = np.insert(self.bending_moment, where, self.bending_moment_array(new))
+        self.slope = np.insert(self.slope, where, slope)
+        self.deflection = np.insert(self.deflection, where, deflection)
+        self.x_points = np.insert(self.x_points, where, new)
+    
+    def calculate(self, n_stations=201):
         """Perform all calculations"""
+        self._n_stations = n_stations
+        
         # Create x points for analysis
-        self.x_points = np.linspace(0, self.L, 1000)
+        with stage('stations'):
+            self.x_points = self.analysis_stations(n_stations)
         
         # Calculate shear force
-        self.shear_force = np.array([self.calculate_shear_force(x) for x in self.x_points])
+        with stage('shear'):
+            self.shear_force = self.shear_force_array(self.x_points)
         
         # Calculate bending moment
-        self.bending_moment = np.array([self.calculate_bending_moment(x) for x in self.x_points])
+        with stage('moment'):
+            self.bending_moment = self.bending_moment_array(self.x_points)
         
         # Calculate deflection
-        x_def, self.deflection = self.calculate_deflection()
+        with stage('deflection'):
+            x_def, self.deflection = self.calculate_deflection()
+            self.max_deflection_position, self.max_deflection = self._locate_max_deflection(
+                self.x_points, self.slope, self.deflection)
         
-        # Calculate maximum values
-        self.max_deflection = np.max(np.abs(self.deflection))
+        self._update_extremes()
+        logging.info(f"Calculations complete: Max deflection={self.max_deflection:.6f}m, Max moment={self.max_moment:.2f}Nm")
+    
+    def _update_extremes(self):
+        """Maximum moment and shear over the stations, and the support rotations"""
         self.max_moment = np.max(np.abs(self.bending_moment))
         self.max_shear = np.max(np.abs(self.shear_force))
         
-        logging.info(f"Calculations complete: Max deflection={self.max_deflection:.6f}m, Max moment={self.max_moment:.2f}Nm")
+        # Rotation at the supports (fixed end and free tip for a cantilever)
+        end_slopes = self.slope_and_deflection_array([0.0, self.L])[0]
+        if self.support_type == 'cantilever':
+            self.support_slopes = {'theta_fixed': float(end_slopes[0]), 'theta_tip': float(end_slopes[1])}
+        else:
+            self.support_slopes = {'theta_A': float(end_slopes[0]), 'theta_B': float(end_slopes[1])}
+    
+    def generate_plots(self, fmt=None, width=None):
+        """
+        Generate all visualization plots.
+
+        Returns the pyplot figures, or with fmt (one of
+        plot_renderer.IMAGE_FORMATS) their encoded bytes at an optional
+        pixel width, closing the figures.
+        """
+        import matplotlib.pyplot as plt
+        from plot_renderer import style_diagram_axes, save_figure
+        
+        with stage('figure'):
+            plt.style.use('default')
+            plots = {}
+            
+            # Shear Force, Bending Moment and Deflection diagrams
+            for name, values in (('shear_force', self.shear_force),
+                                 ('bending_moment', self.bending_moment),
+                                 ('deflection', self.deflection)):
+                fig, ax = plt.subplots(figsize=(10, 6))
+                style_diagram_axes(ax, name, self.x_points[:len(values)], values)
+                plots[name] = fig
+            
+            # Exaggerate deflection for visibility
+            plots['deflection'].axes[0].set_ylim([np.min(self.deflection) * 1.1, np.max(self.deflection) * 1.1])
+            
+            # Beam diagram with loads
+            fig4, ax4 = plt.subplots(figsize=(12, 4))
+            self._draw_beam_diagram(ax4)
+            plots['beam_diagram'] = fig4
+        
+        if fmt is None:
+            return plots
+        
+        images = {}
+        for name, fig in plots.items():
+            buffer = io.BytesIO()
+            fig.tight_layout()
+            with stage('savefig'):
+                save_figure(fig, buffer, fmt, width)
+            plt.close(fig)
+            images[name] = buffer.getvalue()
+        return images
     
-    def generate_plots(self):
-        """Generate all visualization plots"""
-        plt.style.use('default')
-        plots = {}
-        
-        # Shear Force Diagram
-        fig1, ax1 = plt.subplots(figsize=(10, 6))
-        ax1.plot(self.x_points, self.shear_force, 'b-', linewidth=2, label='Shear Force')
-        ax1.axhline(y=0, color='k', linestyle='-', alpha=0.3)
-        ax1.grid(True, alpha=0.3)
-        ax1.set_xlabel('Position along beam (m)')
-        ax1.set_ylabel('Shear Force (N)')
-        ax1.set_title('Shear Force Diagram (SFD)')
-        ax1.legend()
-        plots['shear_force'] = fig1
-        
-        # Bending Moment Diagram
-        fig2, ax2 = plt.subplots(figsize=(10, 6))
-        ax2.plot(self.x_points, self.bending_moment, 'r-', linewidth=2, label='Bending Moment')
-        ax2.axhline(y=0, color='k', linestyle='-', alpha=0.3)
-        ax2.grid(True, alpha=0.3)
-        ax2.set_xlabel('Position along beam (m)')
-        ax2.set_ylabel('Bending Moment (Nm)')
-        ax2.set_title('Bending Moment Diagram (BMD)')
-        ax2.legend()
-        plots['bending_moment'] = fig2
-        
-        # Deflection Curve
-        fig3, ax3 = plt.subplots(figsize=(10, 6))
-        ax3.plot(self.x_points[:len(self.deflection)], self.deflection, 'g-', linewidth=2, label='Deflection')
-        ax3.axhline(y=0, color='k', linestyle='-', alpha=0.3)
-        ax3.grid(True, alpha=0.3)
-        ax3.set_xlabel('Position along beam (m)')
-        ax3.set_ylabel('Deflection (m)')
-        ax3.set_title('Beam Deflection Curve')
-        ax3.legend()
-        # Exaggerate deflection for visibility
-        ax3.set_ylim([np.min(self.deflection) * 1.1, np.max(self.deflection) * 1.1])
-        plots['deflection'] = fig3
-        
-        # Beam diagram with loads
-        fig4, ax4 = plt.subplots(figsize=(12, 4))
-        self._draw_beam_diagram(ax4)
-        plots['beam_diagram'] = fig4
-        
-        return plots
+    def render_plots(self, fmt='png', dpi=150, width=None):
+        """
+        Render all plots straight to encoded image bytes.
+
+        Uses this thread's PlotRenderer, which reuses pre-built figures instead
+        of creating four new ones per call; prefer it to generate_plots when
+        only the images are needed.
+        """
+        from plot_renderer import get_renderer, plot_payload
+        return get_renderer(dpi).render(plot_payload(self), fmt=fmt, width=width)
     
     def _draw_beam_diagram(self, ax):
         """Draw beam diagram with loads and supports"""
-        # Draw beam
-        ax.plot([0, self.L], [0, 0], 'k-', linewidth=8, label='Beam')
-        
-        # Draw supports
-        if self.support_type == 'cantilever':
-            # Fixed support at x=0
-            ax.plot([0, 0], [-0.1, 0.1], 'k-', linewidth=6)
-            ax.add_patch(plt.Rectangle((-0.05, -0.15), 0.1, 0.3, 
-                                     facecolor='gray', edgecolor='black'))
-        else:
-            # Simply supported
-            # Left support
-            ax.plot([0, 0], [-0.1, 0], 'k-', linewidth=4)
-            ax.plot([-0.05, 0.05], [-0.1, -0.1], 'k-', linewidth=4)
-            # Right support  
-            ax.plot([self.L, self.L], [-0.1, 0], 'k-', linewidth=4)
-            ax.plot([self.L-0.05, self.L+0.05], [-0.1, -0.1], 'k-', linewidth=4)
-        
-        # Draw point loads
-        for P, pos in self.point_loads:
-            ax.annotate('', xy=(pos, 0), xytext=(pos, 0.3),
-                       arrowprops=dict(arrowstyle='->', color='red', lw=2))
-            ax.text(pos, 0.35, f'{P}N', ha='center', va='bottom', color='red', fontweight='bold')
-        
-        # Draw distributed loads
-        for w, start, end in self.distributed_loads:
-            x_dist = np.linspace(start, end, 20)
-            y_dist = np.full_like(x_dist, 0.2)
-            ax.plot(x_dist, y_dist, 'b-', linewidth=3)
-            # Draw arrows
-            for x in x_dist[::3]:
-                ax.annotate('', xy=(x, 0), xytext=(x, 0.2),
-                           arrowprops=dict(arrowstyle='->', color='blue', lw=1))
-            ax.text((start + end)/2, 0.25, f'{w}N/m', ha='center', va='bottom', color='blue', fontweight='bold')
-        
-        ax.set_xlim(-self.L*0.1, self.L*1.1)
-        ax.set_ylim(-0.2, 0.5)
-        ax.set_xlabel('Position (m)')
-        ax.set_title('Beam Loading Diagram')
-        ax.grid(True, alpha=0.3)
-        ax.set_aspect('equal', adjustable='box')
+        from plot_renderer import draw_beam_loads, style_beam_axes
+        draw_beam_loads(ax, self.L, self.support_type, self.point_loads, self.distributed_loads,
+                        getattr(self, 'supports', None), self.profile_loads)
+        style_beam_axes(ax)
     
     def get_results(self):
         """Return calculation results as dictionary"""
@@ -378,6 +1267,8 @@ class BeamCalculator:
         return {
             'reactions': reactions,
             'max_deflection': self.max_deflection,
+            'max_deflection_position': self.max_deflection_position,
+            'support_slopes': self.support_slopes,
             'max_moment': self.max_moment,
             'max_shear': self.max_shear,
             'beam_properties': {
@@ -385,10 +1276,13 @@ class BeamCalculator:
                 'young_modulus': self.E,
                 'moment_inertia': self.I,
                 'flexural_rigidity': self.EI,
+                'prismatic': self.prismatic,
                 'support_type': self.support_type
             },
             'loads': {
                 'point_loads': self.point_loads,
-                'distributed_loads': self.distributed_loads
+                'distributed_loads': self.distributed_loads,
+                'profile_loads': [(positions.tolist(), intensities.tolist())
+                                  for positions, intensities in self.profile_loads]
             }
         }
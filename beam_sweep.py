@@ -0,0 +1,195 @@
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from beam_batch import BeamBatch, analyze_batch
+
+# BeamBatch fields shipped to workers as plain arrays
+_BATCH_FIELDS = ('L', 'E', 'I', 'support_types', 'point_magnitudes', 'point_positions',
+                 'distributed_magnitudes', 'distributed_starts', 'distributed_ends')
+
+
+def _chunk_arrays(batch, rows):
+    """Slice a batch into the compact arrays sent to a worker process"""
+    arrays = {name: np.ascontiguousarray(getattr(batch, name)[rows]) for name in _BATCH_FIELDS}
+    # Support types travel as a boolean mask rather than an object array of strings
+    arrays['support_types'] = arrays['support_types'] == 'cantilever'
+    return arrays
+
+
+def _analyze_chunk(index, first_row, arrays, n_points, plot_dir):
+    """Worker entry point: analyze one chunk and optionally render its plots"""
+    support_types = np.where(arrays['support_types'], 'cantilever', 'simply_supported')
+    batch = BeamBatch(arrays['L'], arrays['E'], arrays['I'], support_types,
+                      arrays['point_magnitudes'], arrays['point_positions'],
+                      arrays['distributed_magnitudes'], arrays['distributed_starts'],
+                      arrays['distributed_ends'])
+    results = analyze_batch(batch, n_points=n_points, diagrams=True)
+    results['beam_index'] = np.arange(first_row, first_row + len(batch))
+
+    if plot_dir is not None:
+        _render_chunk_plots(batch, first_row, plot_dir)
+
+    return index, results
+
+
+def _render_chunk_plots(batch, first_row, plot_dir):
+    """Render the standard BeamCalculator figures of every beam in a chunk to PNG files"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from beam_calculator import BeamCalculator
+
+    for i in range(len(batch)):
+        calculator = BeamCalculator(batch.L[i], batch.E[i], batch.I[i], batch.support_types[i])
+        for P, a in zip(batch.point_magnitudes[i], batch.point_positions[i]):
+            if P != 0:
+                calculator.add_point_load(P, a)
+        for w, start, end in zip(batch.distributed_magnitudes[i], batch.distributed_starts[i],
+                                 batch.distributed_ends[i]):
+            if w != 0:
+                calculator.add_distributed_load(w, start, end - start)
+        calculator.calculate()
+
+        for plot_name, fig in calculator.generate_plots().items():
+            fig.savefig(os.path.join(plot_dir, f"beam_{first_row + i:07d}_{plot_name}.png"),
+                        format='png', dpi=100)
+            plt.close(fig)
+
+
+class SweepRunner:
+    """
+    Run a large BeamBatch across a process pool.
+
+    Beams are shipped to workers in chunks of compact NumPy arrays. Each
+    finished chunk is written straight to its own .npz file in output_dir
+    together with a manifest.json index, so memory use does not grow with
+    the size of the sweep. A progress callback receives (beams_done,
+    beams_total) and cancel() stops the sweep from another thread.
+
+    With store=True chunks are appended to a memory-mapped ResultStore in
+    output_dir/store instead, indexed by beam configuration.
+    """
+
+    def __init__(self, output_dir, workers=None, chunk_size=1000, n_points=1000,
+                 render_plots=False, progress=None, store=False):
+        self.output_dir = output_dir
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.n_points = n_points
+        self.render_plots = render_plots
+        self.progress = progress
+        self.store = store
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop submitting chunks and drop the ones not yet started"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self, batch):
+        """Run the sweep and return the manifest describing the chunks written"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        plot_dir = None
+        if self.render_plots:
+            plot_dir = os.path.join(self.output_dir, 'plots')
+            os.makedirs(plot_dir, exist_ok=True)
+
+        n_beams = len(batch)
+        starts = list(range(0, n_beams, self.chunk_size))
+        manifest = {'n_beams': n_beams, 'n_points': self.n_points, 'chunks': [], 'complete': False}
+        done = 0
+        store = None
+        if self.store:
+            from result_store import ResultStore
+            manifest['store'] = 'store'
+            store = ResultStore(os.path.join(self.output_dir, 'store'), mode='a')
+
+        # Only a couple of chunks per worker are in flight, bounding pickled input and pending results
+        max_pending = 2 * self.workers
+        pending = set()
+        next_chunk = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                while (next_chunk < len(starts) or pending) and not self.cancelled:
+                    while next_chunk < len(starts) and len(pending) < max_pending:
+                        first = starts[next_chunk]
+                        rows = slice(first, min(first + self.chunk_size, n_beams))
+                        pending.add(executor.submit(_analyze_chunk, next_chunk, first,
+                                                    _chunk_arrays(batch, rows), self.n_points, plot_dir))
+                        next_chunk += 1
+
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        index, results = future.result()
+                        if store is not None:
+                            manifest['chunks'].append(self._store_chunk(store, batch, results))
+                        else:
+                            manifest['chunks'].append(self._write_chunk(index, results))
+                        done += len(results['beam_index'])
+                        self._write_manifest(manifest)
+                        if self.progress is not None:
+                            self.progress(done, n_beams)
+            finally:
+                for future in pending:
+                    future.cancel()
+                if store is not None:
+                    store.close()
+
+        manifest['complete'] = done == n_beams
+        manifest['chunks'].sort(key=lambda chunk: chunk['first_row'])
+        self._write_manifest(manifest)
+
+        if self.cancelled:
+            logging.info(f"Sweep cancelled after {done} of {n_beams} beams")
+        else:
+            logging.info(f"Sweep complete: {n_beams} beams in {len(starts)} chunks")
+        return manifest
+
+    def _write_chunk(self, index, results):
+        """Write one chunk of results to disk atomically and describe it for the manifest"""
+        filename = f"chunk_{index:05d}.npz"
+        path = os.path.join(self.output_dir, filename)
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **results)
+        os.replace(path + '.tmp', path)
+        return {'file': filename, 'first_row': int(results['beam_index'][0]),
+                'n_beams': len(results['beam_index'])}
+
+    def _store_chunk(self, store, batch, results):
+        """Append one chunk of results to the store and describe it for the manifest"""
+        row = store.append_batch(batch, results, rows=results['beam_index'])
+        return {'store_row': row, 'first_row': int(results['beam_index'][0]),
+                'n_beams': len(results['beam_index'])}
+
+    def _write_manifest(self, manifest):
+        path = os.path.join(self.output_dir, 'manifest.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+
+def iter_sweep_results(output_dir, fields=None):
+    """Yield the result chunks of a sweep one at a time, in beam order (zero-copy from a store)"""
+    with open(os.path.join(output_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+
+    if 'store' in manifest:
+        from result_store import ResultStore
+        store = ResultStore(os.path.join(output_dir, manifest['store']))
+        for chunk in manifest['chunks']:
+            yield store.rows(slice(chunk['store_row'], chunk['store_row'] + chunk['n_beams']), fields)
+        return
+
+    for chunk in manifest['chunks']:
+        with np.load(os.path.join(output_dir, chunk['file'])) as data:
+            names = fields if fields is not None else data.files
+            yield {name: data[name] for name in names}
@@ -0,0 +1,100 @@
+"""
+Import-time budget for a cold start of the web app.
+
+Imports app in a fresh interpreter with -X importtime, then checks two
+things. The cumulative import time of app must stay within the budget.
+The heavy numerics, plotting and Sheets stacks must not be imported
+until a request needs them. It also times the first GET /login served
+by the cold process.
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget 0.5 --runs 5
+
+The exit status is 1 when the budget is exceeded or a deferred module
+is imported eagerly.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds allowed for `import app`, measured on a warm filesystem cache
+IMPORT_BUDGET_SECONDS = 0.4
+
+# Packages that must load on first use, not at import
+DEFERRED_MODULES = ('numpy', 'scipy', 'matplotlib', 'gspread')
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+client = app.app.test_client()
+start = time.perf_counter()
+status = client.get('/login').status_code
+first_request = time.perf_counter() - start
+loaded = sorted({name.split('.')[0] for name in sys.modules} & set(json.loads(sys.argv[1])))
+print(json.dumps({'import': imported, 'first_login': first_request, 'status': status, 'loaded': loaded}))
+"""
+
+
+def probe():
+    """Import app in a fresh interpreter and return its timings and the deferred modules it loaded"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE, json.dumps(DEFERRED_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['slowest'] = _slowest_imports(result.stderr)
+    return report
+
+
+def _slowest_imports(importtime_output, count=10):
+    """The direct imports of app with the largest cumulative time, from -X importtime output"""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nesting adds two spaces per level; app itself is at the first level
+        if name.startswith('   ') and not name.startswith('    '):
+            imports.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the cold-start import time of app.py')
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_SECONDS,
+                        help=f'seconds allowed for import app (default {IMPORT_BUDGET_SECONDS})')
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters to measure (median is used)')
+    args = parser.parse_args(argv)
+
+    reports = [probe() for _ in range(args.runs)]
+    import_time = statistics.median(report['import'] for report in reports)
+    first_login = statistics.median(report['first_login'] for report in reports)
+    loaded = reports[-1]['loaded']
+
+    print(f"import app          {import_time * 1000:8.1f} ms  (budget {args.budget * 1000:.0f} ms)")
+    print(f"first GET /login    {first_login * 1000:8.1f} ms  (status {reports[-1]['status']})")
+    print("slowest imports of app:")
+    for seconds, name in reports[-1]['slowest']:
+        print(f"  {name:30s} {seconds * 1000:8.1f} ms")
+
+    failed = False
+    if import_time > args.budget:
+        print(f"FAIL: import app took {import_time:.3f}s, over the {args.budget:.3f}s budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported at startup but should be deferred: {', '.join(loaded)}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""
+Benchmark suite for BeamCalculator and the /calculate request path.
+
+Runs offline: the app's user directory is backed by an InMemoryWorksheet
+instead of Google Sheets, so no credentials or network are needed.
+
+    python benchmarks/run_benchmarks.py                      # full suite
+    python benchmarks/run_benchmarks.py --quick              # fewer repeats
+    python benchmarks/run_benchmarks.py --only loads         # matching names only
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --save-baseline      # store as baseline
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+
+Results are JSON: the median and minimum wall time of every benchmark in
+seconds plus the environment they were measured in. With a baseline,
+benchmarks whose median is more than --threshold slower are reported as
+regressions and the exit status is 1.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import statistics
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from beam_calculator import BeamCalculator
+from user_directory import InMemoryWorksheet, SheetsUserDirectory
+from auth_workers import AttemptThrottle, SheetWriteQueue
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+BEAM = {'length': 10.0, 'young_modulus': 200e9, 'moment_inertia': 8.33e-6}
+
+
+def make_calculator(n_loads, support_type='simply_supported', seed=0):
+    """A beam with n_loads loads, alternating point and distributed, always the same for a seed"""
+    rng = np.random.default_rng(seed)
+    length = BEAM['length']
+    calculator = BeamCalculator(length, BEAM['young_modulus'], BEAM['moment_inertia'], support_type)
+    for i in range(n_loads):
+        if i % 2 == 0:
+            calculator.add_point_load(float(rng.uniform(100, 10000)), float(rng.uniform(0, length)))
+        else:
+            start = float(rng.uniform(0, length * 0.8))
+            calculator.add_distributed_load(float(rng.uniform(100, 5000)), start,
+                                            float(rng.uniform(0.1, length - start)))
+    return calculator
+
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times after one warm-up run and return its timings in seconds"""
+    if setup is not None:
+        setup()
+    func()
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'median': statistics.median(times), 'min': min(times), 'runs': repeat}
+
+
+def bench_loads(repeat):
+    """calculate() as the number of loads grows"""
+    for n_loads in (1, 10, 100, 1000):
+        calculator = make_calculator(n_loads)
+        yield f'loads/{n_loads}', measure(calculator.calculate, repeat)
+
+
+def bench_stations(repeat):
+    """calculate() and calculate_deflection() as the number of stations grows"""
+    calculator = make_calculator(10)
+    for n_stations in (101, 1001, 10001):
+        yield f'stations/calculate/{n_stations}', measure(
+            lambda: calculator.calculate(n_stations=n_stations), repeat)
+    for n_points in (1000, 10000, 100000):
+        x = np.linspace(0, calculator.L, n_points)
+        yield f'stations/deflection/{n_points}', measure(
+            lambda: calculator.calculate_deflection(x), repeat)
+
+
+def bench_supports(repeat):
+    """calculate() for each support type with the same loads"""
+    for support_type in ('simply_supported', 'cantilever'):
+        calculator = make_calculator(10, support_type)
+        yield f'supports/{support_type}', measure(calculator.calculate, repeat)
+
+
+def bench_edits(repeat):
+    """Editing one load of a calculated beam, against a full recalculation"""
+    for n_loads in (10, 1000):
+        calculator = make_calculator(n_loads)
+        calculator.calculate()
+        magnitude, position = calculator.point_loads[0]
+        flip = [1.0]
+
+        def edit():
+            flip[0] = -flip[0]
+            calculator.update_point_load(0, magnitude * (1.5 + flip[0] / 2), position)
+
+        yield f'edits/update/{n_loads}', measure(edit, repeat)
+        yield f'edits/recalculate/{n_loads}', measure(calculator.calculate, repeat)
+
+
+def bench_combinations(repeat):
+    """Default load combinations of four cases by superposition, against solving each combination"""
+    from load_combinations import LOAD_CASES, LoadCombinations
+
+    combinations = LoadCombinations({case: make_calculator(25, seed=i) for i, case in enumerate(LOAD_CASES)})
+    yield 'combinations/superposed', measure(combinations.solve, repeat)
+
+    def solve_each():
+        for name in combinations.combination_names:
+            combinations.combined(name).calculate()
+
+    yield 'combinations/separate', measure(solve_each, repeat)
+
+
+def bench_moving(repeat):
+    """Envelope of a three-axle train rolled across simply supported and continuous beams"""
+    from continuous_beam import ContinuousBeamCalculator
+    from influence_lines import moving_load_envelope
+
+    length = BEAM['length']
+    beams = {
+        'simply_supported': BeamCalculator(length, BEAM['young_modulus'], BEAM['moment_inertia']),
+        'continuous': ContinuousBeamCalculator(length, BEAM['young_modulus'], BEAM['moment_inertia'],
+                                               supports=[0.0, length / 2, length]),
+    }
+    for name, beam in beams.items():
+        yield f'moving/{name}', measure(
+            lambda: moving_load_envelope(beam, [35e3, 145e3, 145e3], [4.3, 4.3]), repeat)
+
+
+def bench_profiles(repeat):
+    """A linearly varying load sampled ever more finely, against the same load as stacked uniform loads"""
+    length = BEAM['length']
+    for n_samples in (10, 1000, 100000):
+        calculator = BeamCalculator(length, BEAM['young_modulus'], BEAM['moment_inertia'])
+        positions = np.linspace(0, length, n_samples)
+        calculator.add_sampled_load(positions, 1000 + 500 * positions)
+        yield f'profiles/sampled/{n_samples}', measure(calculator.calculate, repeat)
+
+    calculator = BeamCalculator(length, BEAM['young_modulus'], BEAM['moment_inertia'])
+    starts = np.linspace(0, length, 1001)[:-1]
+    calculator.add_distributed_loads(1000 + 500 * (starts + length / 2000), starts, length / 1000)
+    yield 'profiles/stacked_uniform/1000', measure(calculator.calculate, max(1, repeat // 10))
+
+
+def bench_sections(repeat):
+    """Lightest-section search over the standard catalog, against solving the beam once per section"""
+    from section_catalog import optimize_section, standard_catalog
+
+    calculator = make_calculator(10)
+    catalog = standard_catalog()
+
+    def screened():
+        calculator.calculate()
+        return optimize_section(calculator, count=1)
+
+    def solve_each():
+        P, a, w, start, end = calculator.load_columns()
+        passing = []
+        for i in range(len(catalog)):
+            trial = BeamCalculator(calculator.L, catalog.young_modulus[i], catalog.moment_inertia[i])
+            trial.add_point_loads(P, a)
+            trial.add_distributed_loads(w, start, end - start)
+            trial.calculate()
+            if trial.max_deflection <= calculator.L / 360 and trial.max_moment <= catalog.moment_capacity[i]:
+                passing.append(i)
+        return min(passing, key=lambda i: catalog.mass_per_metre[i])
+
+    assert catalog.names[solve_each()] == screened()['sections'][0]['name']
+    yield 'sections/screened', measure(screened, repeat)
+    yield 'sections/per_section', measure(solve_each, max(1, repeat // 10))
+
+
+def bench_plots(repeat):
+    """Plot rendering through pyplot figures and through the template renderer"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import io
+    import matplotlib.pyplot as plt
+
+    calculator = make_calculator(10)
+    calculator.calculate()
+
+    def pyplot_figures():
+        for fig in calculator.generate_plots().values():
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
+            plt.close(fig)
+
+    yield 'plots/generate_plots', measure(pyplot_figures, repeat)
+    yield 'plots/render_plots', measure(lambda: calculator.render_plots(fmt='png', dpi=150), repeat)
+
+
+def bench_signups(repeat):
+    """50 signups and a login each through SheetsUserDirectory, on a sheet with 5 ms latency"""
+    users = [(f'New {i}', f'new{i}@example.com', 'x') for i in range(50)]
+
+    def sign_up(directory):
+        for name, email, password_hash in users:
+            directory.add(name, email, password_hash)
+            assert directory.find(email) is not None
+
+    def append_each():
+        worksheet = InMemoryWorksheet(latency=0.005)
+        sign_up(SheetsUserDirectory(worksheet))
+
+    def queued():
+        worksheet = InMemoryWorksheet(latency=0.005)
+        writer = SheetWriteQueue(worksheet, delay=0.01)
+        sign_up(SheetsUserDirectory(worksheet, writer=writer))
+        writer.close()
+        assert len(worksheet.rows) == len(users) + 1
+
+    yield 'signups/append_row', measure(append_each, max(1, repeat // 4))
+    yield 'signups/write_queue', measure(queued, max(1, repeat // 4))
+
+
+def load_app():
+    """Import the Flask app with its user directory backed by an in-memory sheet"""
+    import app as app_module
+    worksheet = InMemoryWorksheet([[f'User {i}', f'user{i}@example.com', 'x'] for i in range(1000)])
+    app_module.users = SheetsUserDirectory(worksheet)
+    # Repeated logins for one email would otherwise be throttled
+    app_module.login_throttle = AttemptThrottle(max_attempts=10**9)
+    return app_module
+
+
+def bench_endpoint(repeat):
+    """End-to-end /calculate and /login through the Flask test client"""
+    app_module = load_app()
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['name'] = 'Benchmark'
+
+    form = {
+        'beam_length': '10', 'young_modulus': '200e9', 'moment_inertia': '8.33e-6',
+        'support_type': 'simply_supported',
+        'load_type[]': ['point', 'distributed', 'point'],
+        'load_magnitude[]': ['5000', '2000', '3000'],
+        'load_position[]': ['3', '4', '8'],
+        'load_length[]': ['', '3', ''],
+    }
+
+    def post_calculate():
+        response = client.post('/calculate', data=form)
+        assert response.status_code == 200, response.status_code
+
+    yield 'endpoint/calculate/cold', measure(post_calculate, repeat, setup=app_module.result_cache.clear)
+    yield 'endpoint/calculate/cached', measure(post_calculate, repeat)
+
+    payload = {'beam_length': 10, 'young_modulus': 200e9, 'moment_inertia': 8.33e-6,
+               'support_type': 'simply_supported', 'encoding': 'base64', 'tolerance': 0.001,
+               'loads': [{'type': 'point', 'magnitude': 5000, 'position': 3},
+                         {'type': 'distributed', 'magnitude': 2000, 'position': 4, 'length': 3}]}
+
+    def post_api():
+        response = client.post('/api/calculate', json=payload)
+        assert response.status_code == 200, response.status_code
+
+    yield 'endpoint/api_calculate', measure(post_api, repeat)
+
+    # A failed login still goes through the whole user lookup
+    def post_login():
+        client.post('/login', json={'action': 'login', 'email': 'user500@example.com', 'password': 'wrong'})
+
+    yield 'endpoint/login', measure(post_login, repeat)
+
+
+BENCHMARKS = {
+    'loads': bench_loads,
+    'stations': bench_stations,
+    'supports': bench_supports,
+    'edits': bench_edits,
+    'combinations': bench_combinations,
+    'moving': bench_moving,
+    'profiles': bench_profiles,
+    'sections': bench_sections,
+    'plots': bench_plots,
+    'signups': bench_signups,
+    'endpoint': bench_endpoint,
+}
+
+
+def run(only=None, repeat=20):
+    results = {}
+    for group, bench in BENCHMARKS.items():
+        if only and not any(pattern in group for pattern in only):
+            continue
+        for name, timing in bench(repeat):
+            results[name] = timing
+            print(f"{name:40s} {timing['median'] * 1000:10.3f} ms  (min {timing['min'] * 1000:.3f} ms)")
+    return results
+
+
+def environment():
+    import scipy
+    import matplotlib
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+        'scipy': scipy.__version__,
+        'matplotlib': matplotlib.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return the benchmarks whose median is more than threshold slower than the baseline"""
+    regressions = []
+    for name, timing in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        ratio = timing['median'] / reference['median']
+        marker = ''
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+            marker = '  REGRESSION'
+        print(f"{name:40s} {ratio:6.2f}x baseline{marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='5 repeats instead of 20')
+    parser.add_argument('--only', nargs='*', help='run only benchmark groups containing these names')
+    parser.add_argument('--output', help='write results JSON to this file')
+    parser.add_argument('--baseline', help='compare against this results JSON')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help=f'write results to {os.path.relpath(DEFAULT_BASELINE, ROOT)}')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown reported as a regression (default 0.2)')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    results = run(args.only, repeat=5 if args.quick else 20)
+    report = {'environment': environment(), 'results': results}
+
+    for path in filter(None, (args.output, DEFAULT_BASELINE if args.save_baseline else None)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
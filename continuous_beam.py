@@ -0,0 +1,314 @@
+import numpy as np
+import logging
+from numbers import Real
+
+from beam_calculator import BeamCalculator, _cumulative_trapezoid
+
+SUPPORT_TYPES = ('continuous', 'fixed_fixed', 'propped_cantilever')
+
+# Relative distance below which load and support positions share a node
+_MERGE_TOLERANCE = 1e-9
+
+# Support layouts fixed by the support type; 'continuous' takes its pin positions from the caller
+_END_SUPPORTS = {
+    'fixed_fixed': (('fixed', 0.0), ('fixed', 1.0)),
+    'propped_cantilever': (('fixed', 0.0), ('pin', 1.0)),
+}
+
+
+def _element_stiffness(EI, h):
+    """Euler-Bernoulli beam element stiffness matrices, one 4x4 per element length in h"""
+    h = h[:, np.newaxis, np.newaxis]
+    k = np.array([[12.0, 6.0, -12.0, 6.0],
+                  [6.0, 4.0, -6.0, 2.0],
+                  [-12.0, -6.0, 12.0, -6.0],
+                  [6.0, 2.0, -6.0, 4.0]])
+    # Columns and rows of rotations carry one power of h each
+    powers = np.array([0, 1, 0, 1])
+    return EI / h**3 * k * h ** (powers[:, np.newaxis] + powers[np.newaxis, :])
+
+
+def _nearest_node(nodes, x):
+    """Index of the node closest to each position in x"""
+    i = np.clip(np.searchsorted(nodes, x), 1, len(nodes) - 1)
+    return np.where(x - nodes[i - 1] <= nodes[i] - x, i - 1, i)
+
+
+def solve_beam(length, EI, supports, loads):
+    """
+    Nodal displacements and support reactions of a beam on any supports.
+
+    supports is a sequence of (kind, position) with kind 'pin' (no
+    deflection) or 'fixed' (no deflection or rotation); loads are the
+    (P, a, w, start, end) arrays of BeamCalculator. Nodes sit at the ends,
+    supports and every load breakpoint, so with consistent load vectors the
+    nodal values are exact. The stiffness matrix is stored as a symmetric
+    band of half-width 3 and solved by banded Cholesky in O(nodes) time.
+
+    Returns a dict with
+      nodes          node positions
+      displacements  deflection (up positive) and rotation (anticlockwise
+                     positive) of every node, interleaved
+      end_forces     (elements, 4) forces and couples the neighbouring
+                     structure applies to each element's ends
+      intensity      uniform load intensity on each element
+      reactions      upward force and anticlockwise couple of each support
+    """
+    from scipy.linalg import solveh_banded, LinAlgError
+
+    P, a, w, s, e = loads
+    support_kinds = [kind for kind, _ in supports]
+    support_positions = np.array([position for _, position in supports], dtype=float)
+
+    # Breakpoints closer than a tiny fraction of the length share a node:
+    # an element that short would make the stiffness matrix singular
+    points = np.unique(np.concatenate(([0.0, length], support_positions, a, s, e)))
+    nodes = points[np.concatenate(([True], np.diff(points) > _MERGE_TOLERANCE * length))]
+    nodes[-1] = points[-1]
+    h = np.diff(nodes)
+    n_dof = 2 * len(nodes)
+    elements = np.arange(len(h))
+    dofs = 2 * elements[:, np.newaxis] + np.arange(4)
+    k = _element_stiffness(EI, h)
+
+    # Upper band storage for solveh_banded: band[3 + i - j, j] = K[i, j] for i <= j
+    band = np.zeros((4, n_dof))
+    for row in range(4):
+        for col in range(row, 4):
+            np.add.at(band[3 + row - col], dofs[:, col], k[:, row, col])
+
+    # Consistent nodal loads; downward loads are negative in the element convention
+    F = np.zeros(n_dof)
+    np.add.at(F, 2 * _nearest_node(nodes, a), -P)
+    q = np.zeros(len(h))
+    element_loads = np.zeros((len(h), 4))
+    if len(w):
+        # Intensity over each element from ramp prefix sums at its midpoint
+        mid = (nodes[:-1] + nodes[1:]) / 2
+        origins = np.concatenate((s, e))
+        order = np.argsort(origins, kind='stable')
+        cumulative = np.concatenate(([0.0], np.cumsum(np.concatenate((w, -w))[order])))
+        q = cumulative[np.searchsorted(origins[order], mid, side='right')]
+        element_loads = np.stack((-q * h / 2, -q * h**2 / 12, -q * h / 2, q * h**2 / 12), axis=1)
+        np.add.at(F, dofs, element_loads)
+
+    # Restrain supported degrees of freedom by replacing their rows and columns with the identity
+    support_nodes = _nearest_node(nodes, support_positions)
+    restrained = [2 * node for node in support_nodes]
+    restrained += [2 * node + 1 for node, kind in zip(support_nodes, support_kinds) if kind == 'fixed']
+    restrained = np.array(restrained)
+    solved_band = band.copy()
+    solved_band[:, restrained] = 0.0
+    for offset in range(1, 4):
+        columns = restrained + offset
+        columns = columns[columns < n_dof]
+        solved_band[3 - offset, columns] = 0.0
+    solved_band[3, restrained] = 1.0
+    rhs = F.copy()
+    rhs[restrained] = 0.0
+
+    try:
+        displacements = solveh_banded(solved_band, rhs)
+    except LinAlgError:
+        raise ValueError("The supports do not restrain the beam: it is a mechanism")
+
+    # Element end forces, and the reactions as the nodal forces the restraints supply: K u - F
+    end_forces = np.einsum('epq,eq->ep', k, displacements[dofs]) - element_loads
+    Ku = np.zeros(n_dof)
+    np.add.at(Ku, dofs, end_forces + element_loads)
+    residual = Ku - F
+    reactions = []
+    for node, kind, position in zip(support_nodes, support_kinds, support_positions):
+        couple = residual[2 * node + 1] if kind == 'fixed' else 0.0
+        reactions.append({'position': float(position), 'type': kind,
+                          'force': float(residual[2 * node]), 'couple': float(couple)})
+    return {'nodes': nodes, 'displacements': displacements, 'end_forces': end_forces,
+            'intensity': q, 'reactions': reactions}
+
+
+class ContinuousBeamCalculator(BeamCalculator):
+    """
+    Statically indeterminate beams: continuous over several pinned
+    supports, fixed at both ends, or a propped cantilever (fixed at x=0,
+    pinned at x=L).
+
+    Nodal displacements and element end forces come from a banded finite
+    element solve (see solve_beam); shear, moment and deflection are then
+    evaluated exactly inside each element, so calculate(), the plots and
+    get_results() work as for BeamCalculator. Bending moments are
+    sagging-positive.
+    """
+
+    # Reactions depend on every load through the stiffness solve, so load
+    # edits re-solve and recalculate instead of superposing
+    incremental = False
+
+    __slots__ = ('supports', '_solution')
+
+    def __init__(self, length, young_modulus, moment_inertia, support_type='continuous', supports=None):
+        if support_type not in SUPPORT_TYPES:
+            raise ValueError(f"Unsupported beam type: {support_type}")
+        super().__init__(length, young_modulus, moment_inertia, support_type)
+
+        if support_type in _END_SUPPORTS:
+            self.supports = [(kind, fraction * length) for kind, fraction in _END_SUPPORTS[support_type]]
+        else:
+            if supports is None:
+                supports = (0.0, length)
+            # A string would otherwise be read one character at a time
+            if isinstance(supports, (str, bytes)) or not np.iterable(supports):
+                raise ValueError("Support positions must be a list of numbers")
+            if not all(isinstance(position, Real) and not isinstance(position, bool) and np.isfinite(position)
+                       for position in supports):
+                raise ValueError("Support positions must be finite numbers")
+            positions = sorted(set(float(position) for position in supports))
+            if len(positions) < 2:
+                raise ValueError("A continuous beam needs at least two supports")
+            if positions[0] < 0 or positions[-1] > length:
+                raise ValueError(f"Support positions must lie within the beam length {length}")
+            self.supports = [('pin', position) for position in positions]
+
+        self._solution = None
+        logging.info(f"Supports: {', '.join(f'{kind} at {position}m' for kind, position in self.supports)}")
+
+    def empty_copy(self):
+        return ContinuousBeamCalculator(self.L, self.E, self.I, self.support_type,
+                                        [position for kind, position in self.supports])
+
+    def _add_profile(self, positions, intensities):
+        raise ValueError("Linear and sampled loads are only supported on simply supported and cantilever beams")
+
+    def set_flexural_rigidity(self, rigidity):
+        if rigidity is not None:
+            raise ValueError("A varying EI is only supported on simply supported and cantilever beams")
+
+    def _loads_changed(self, removed=None, added=None):
+        self._solution = None
+        super()._loads_changed(removed, added)
+
+    def _compiled_loads(self):
+        # The compiled model only knows statically determinate supports
+        return None
+
+    def solve(self):
+        """Solve the stiffness model for the current loads (cached until the loads change)"""
+        if self._solution is None:
+            self._solution = solve_beam(self.L, self.EI, self.supports, super()._load_arrays())
+        return self._solution
+
+    def calculate_reactions(self):
+        """Support reactions numbered from the left: R_i upward forces, M_i fixed end moments"""
+        reactions = {}
+        for i, reaction in enumerate(self.solve()['reactions'], start=1):
+            reactions[f'R_{i}'] = reaction['force']
+            if reaction['type'] == 'fixed':
+                # Reported like a cantilever's M_fixed: the hogging moment the support resists
+                reactions[f'M_{i}'] = reaction['couple'] if reaction['position'] == 0 else -reaction['couple']
+        return reactions
+
+    def _load_arrays(self):
+        """Applied loads plus the reactions of supports inside the span as upward point loads"""
+        P, a, w, s, e = super()._load_arrays()
+        inner = [reaction for reaction in self.solve()['reactions'] if 0 < reaction['position'] < self.L]
+        P = np.concatenate((P, [-reaction['force'] for reaction in inner]))
+        a = np.concatenate((a, [reaction['position'] for reaction in inner]))
+        return P, a, w, s, e
+
+    def _locate(self, x):
+        """Element holding each station (loads at a node count as left of it) and the offset into it"""
+        solution = self.solve()
+        nodes = solution['nodes']
+        element = np.clip(np.searchsorted(nodes, x, side='right') - 1, 0, len(nodes) - 2)
+        return solution, element, x - nodes[element]
+
+    def shear_force_array(self, x):
+        """Shear force at every station in x from the element end forces"""
+        x = np.asarray(x, dtype=float)
+        solution, element, xi = self._locate(x)
+        return solution['end_forces'][element, 0] - solution['intensity'][element] * xi
+
+    def bending_moment_array(self, x):
+        """Sagging bending moment at every station in x from the element end forces"""
+        x = np.asarray(x, dtype=float)
+        solution, element, xi = self._locate(x)
+        end_forces = solution['end_forces'][element]
+        return -end_forces[..., 1] + end_forces[..., 0] * xi - solution['intensity'][element] * xi**2 / 2
+
+    def slope_and_deflection_array(self, x):
+        """
+        Exact slope and deflection at stations x.
+
+        Within an element the deflection is the cubic Hermite interpolation
+        of its nodal values plus the fixed-end deflection of its uniform
+        load, which is the exact Euler-Bernoulli solution.
+        """
+        x = np.asarray(x, dtype=float)
+        if x.ndim == 0:
+            slope, deflection = self.slope_and_deflection_array(x[np.newaxis])
+            return slope[0], deflection[0]
+        solution, element, xi = self._locate(x)
+        h = np.diff(solution['nodes'])[element]
+        u = solution['displacements']
+        v1, t1, v2, t2 = u[2 * element], u[2 * element + 1], u[2 * element + 2], u[2 * element + 3]
+        q = solution['intensity'][element]
+
+        r = xi / h
+        deflection = ((1 - 3 * r**2 + 2 * r**3) * v1 + h * (r - 2 * r**2 + r**3) * t1
+                      + (3 * r**2 - 2 * r**3) * v2 + h * (r**3 - r**2) * t2
+                      - q * xi**2 * (h - xi)**2 / (24 * self.EI))
+        slope = ((6 * r**2 - 6 * r) / h * (v1 - v2) + (1 - 4 * r + 3 * r**2) * t1
+                 + (3 * r**2 - 2 * r) * t2
+                 - q * xi * (h - xi) * (h - 2 * xi) / (12 * self.EI))
+        return slope, deflection
+
+    def calculate_shear_force(self, x):
+        """Calculate shear force at position x"""
+        return float(self.shear_force_array([x])[0])
+
+    def calculate_bending_moment(self, x):
+        """Calculate bending moment at position x"""
+        return float(self.bending_moment_array([x])[0])
+
+    def _locate_max_deflection(self, x, slope, deflection):
+        """Largest deflection magnitude, refining every slope sign change by bisection at once"""
+        best = int(np.argmax(np.abs(deflection)))
+        position, value = x[best], abs(deflection[best])
+
+        crossings = np.nonzero(np.sign(slope[:-1]) * np.sign(slope[1:]) < 0)[0]
+        if len(crossings):
+            low, high = x[crossings], x[crossings + 1]
+            low_sign = np.sign(slope[crossings])
+            for _ in range(60):
+                mid = (low + high) / 2
+                same = np.sign(self.slope_and_deflection_array(mid)[0]) == low_sign
+                low, high = np.where(same, mid, low), np.where(same, high, mid)
+            roots = (low + high) / 2
+            candidates = np.abs(self.slope_and_deflection_array(roots)[1])
+            i = int(np.argmax(candidates))
+            if candidates[i] > value:
+                position, value = roots[i], candidates[i]
+
+        return float(position), float(value)
+
+    def _integrate_deflection(self, x, moments):
+        """Integrate EI * y'' = M twice and fit the constants to the first supports"""
+        slope = _cumulative_trapezoid(moments / self.EI, x)
+        deflection = _cumulative_trapezoid(slope, x)
+
+        first_kind, first = self.supports[0]
+        if first_kind == 'fixed':
+            # No deflection or rotation at the first support
+            theta0 = -np.interp(first, x, slope)
+            v0 = -np.interp(first, x, deflection) - theta0 * (first - x[0])
+        else:
+            # No deflection at the first two supports
+            positions = np.array([position for _, position in self.supports[:2]])
+            A = np.column_stack((positions - x[0], np.ones(2)))
+            theta0, v0 = np.linalg.solve(A, -np.interp(positions, x, deflection))
+        return slope + theta0, deflection + v0 + theta0 * (x - x[0])
+
+    def get_results(self):
+        """Return calculation results as dictionary, with the support layout"""
+        results = super().get_results()
+        results['supports'] = [{'type': kind, 'position': position} for kind, position in self.supports]
+        return results
@@ -0,0 +1,83 @@
+import base64
+
+import numpy as np
+
+SERIES_ENCODINGS = ('list', 'base64')
+
+
+def simplify_series(x, y, tolerance):
+    """
+    Keep only the points needed to redraw a diagram within `tolerance`.
+
+    Ramer-Douglas-Peucker on vertical distance: a point survives when
+    dropping it would move the polyline by more than `tolerance` (in y
+    units). Straight segments collapse to their ends, while load
+    breakpoints, jumps and curved stretches keep their points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= 2:
+        return x, y
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        inner = slice(first + 1, last)
+        span = x[last] - x[first]
+        if span > 0:
+            line = y[first] + (y[last] - y[first]) * (x[inner] - x[first]) / span
+        else:
+            # Vertical jump: the chord is undefined, measure from its lower end
+            line = np.full(last - first - 1, min(y[first], y[last]))
+        error = np.abs(y[inner] - line)
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return x[keep], y[keep]
+
+
+def encode_series(values, encoding='list'):
+    """
+    Encode a diagram series as float32.
+
+    'list' gives a JSON array of float32-rounded numbers, 'base64' the
+    little-endian float32 bytes, about a quarter of the size of the list.
+    """
+    values = np.asarray(values, dtype='<f4')
+    if encoding == 'list':
+        return values.tolist()
+    if encoding == 'base64':
+        return base64.b64encode(values.tobytes()).decode()
+    raise ValueError(f"Unknown series encoding: {encoding}")
+
+
+def diagram_series(calculator, encoding='list', tolerance=None):
+    """
+    Compact shear, moment and deflection series of a calculated beam.
+
+    tolerance is relative to each diagram's largest magnitude; None keeps
+    every station.
+    """
+    series = {}
+    for name, values in (('shear_force', calculator.shear_force),
+                         ('bending_moment', calculator.bending_moment),
+                         ('deflection', calculator.deflection)):
+        x = calculator.x_points[:len(values)]
+        if tolerance is not None:
+            scale = np.max(np.abs(values)) if len(values) else 0.0
+            x, values = simplify_series(x, values, tolerance * scale)
+        series[name] = {
+            'x': encode_series(x, encoding),
+            'y': encode_series(values, encoding),
+            'points': len(x),
+        }
+    return series
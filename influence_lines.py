@@ -0,0 +1,171 @@
+import numpy as np
+import logging
+
+from beam_calculator import (
+    _load_resultants, _cantilever_reactions, _simply_supported_reactions,
+    _shear_force, _bending_moment
+)
+
+# Support types whose influence lines follow from statics alone
+DETERMINATE_TYPES = ('cantilever', 'simply_supported')
+
+# Relative distance within which a load position counts as on a station
+_STATION_TOLERANCE = 1e-9
+
+
+def influence_lines(beam, stations=None, n_positions=1001):
+    """
+    Unit-load influence lines for shear and bending moment at every station.
+
+    A unit downward load is placed at n_positions evenly spaced positions
+    from 0 to L. Returns a dict with stations (S,), positions (n_positions,)
+    and shear / bending_moment arrays of shape (S, n_positions) holding the
+    value at each station for the load at each position, in the beam's own
+    sign conventions. Loads already on the beam are ignored.
+
+    Cantilever and simply supported beams evaluate the Macaulay kernels for
+    all positions in one batch; continuous beams solve once per position.
+    """
+    if stations is None:
+        stations = np.linspace(0, beam.L, 201)
+    stations = np.asarray(stations, dtype=float)
+    positions = np.linspace(0, beam.L, n_positions)
+
+    if beam.support_type in DETERMINATE_TYPES:
+        shear, moment = _determinate_lines(beam, stations, positions)
+    else:
+        shear, moment = _solved_lines(beam, stations, positions)
+
+    return {'stations': stations, 'positions': positions, 'shear': shear, 'bending_moment': moment}
+
+
+def _determinate_lines(beam, stations, positions):
+    """Influence lines of a statically determinate beam, one batch row per load position"""
+    n = len(positions)
+    empty = np.zeros((n, 0))
+    loads = (np.ones((n, 1)), positions[:, np.newaxis], empty, empty, empty)
+    total, moment = _load_resultants(*loads)
+    cantilever = beam.support_type == 'cantilever'
+    if cantilever:
+        reactions = _cantilever_reactions(total, moment)
+        F0, C0 = reactions['R_y'], -reactions['M_fixed']
+    else:
+        F0, C0 = _simply_supported_reactions(total, moment, beam.L)['R_A'], np.zeros(n)
+
+    x = np.broadcast_to(stations, (n, len(stations)))
+    shear = _shear_force(x, F0, loads)
+    moment_lines = _bending_moment(x, cantilever, F0, C0, loads)
+    return shear.T, moment_lines.T
+
+
+def _solved_lines(beam, stations, positions):
+    """Influence lines of a statically indeterminate beam, re-solving for each load position"""
+    unit = beam.empty_copy()
+    unit.add_point_load(1.0, 0.0)
+    shear = np.empty((len(stations), len(positions)))
+    moment = np.empty_like(shear)
+    for j, position in enumerate(positions):
+        # Move the unit load in place; add/update would log every step
+        unit._point[0] = (1.0, position)
+        unit._loads_changed()
+        shear[:, j] = unit.shear_force_array(stations)
+        moment[:, j] = unit.bending_moment_array(stations)
+    return shear, moment
+
+
+def _train_kernel(axle_loads, axle_spacings, step):
+    """
+    Axle loads spread onto the influence-line grid behind the first axle.
+
+    An axle between two grid points is split between them in proportion to
+    its distance, which reproduces linear interpolation of the influence line.
+    """
+    axle_loads = np.asarray(axle_loads, dtype=float)
+    offsets = np.concatenate(([0.0], np.cumsum(np.asarray(axle_spacings, dtype=float)))) / step
+    if len(offsets) != len(axle_loads):
+        raise ValueError("A load train needs one spacing fewer than it has axles")
+    if np.any(offsets[1:] < offsets[:-1]):
+        raise ValueError("Axle spacings must not be negative")
+
+    below = np.floor(offsets).astype(int)
+    fraction = offsets - below
+    kernel = np.zeros(below[-1] + 2)
+    np.add.at(kernel, below, axle_loads * (1 - fraction))
+    np.add.at(kernel, below + 1, axle_loads * fraction)
+    return kernel
+
+
+def _convolve_rows(lines, kernel):
+    """
+    Full convolution of every row of lines with kernel.
+
+    A train kernel is mostly zeros, so adding one shifted, scaled copy of the
+    lines per axle grid point is exact and cheaper than an FFT.
+    """
+    n_positions = lines.shape[1]
+    result = np.zeros((lines.shape[0], n_positions + len(kernel) - 1))
+    for q in np.flatnonzero(kernel):
+        result[:, q:q + n_positions] += kernel[q] * lines
+    return result
+
+
+def moving_load_envelope(beam, axle_loads, axle_spacings=(), stations=None, n_positions=1001, lines=None):
+    """
+    Shear and moment envelopes at every station for a train of axle loads
+    rolling across the beam in both directions.
+
+    axle_loads lists the axle magnitudes from the front of the train and
+    axle_spacings the gaps between consecutive axles. The front axle steps
+    through every influence-line position, from the train just entering the
+    beam until it has left, so each envelope is one convolution of the
+    influence lines with the train. Pass lines from influence_lines() to
+    reuse them for several trains. Envelopes are exact when stations and
+    axle spacings fall on the position grid, as the default stations do.
+
+    Returns a dict with the stations and, for shear and bending_moment, the
+    envelopes <name>_max / <name>_min with the governing front-axle position
+    (<name>_max_position, ...) and travel direction (<name>_max_direction,
+    +1 left to right, -1 right to left).
+    """
+    if lines is None:
+        lines = influence_lines(beam, stations, n_positions)
+    stations, positions = lines['stations'], lines['positions']
+    step = positions[1] - positions[0]
+    kernel = _train_kernel(axle_loads, axle_spacings, step)
+    reach = len(kernel) - 1
+
+    # Travelling left to right the train trails behind (left of) its front
+    # axle; right to left it trails to the right, i.e. the kernel is flipped
+    # and the front axle sits reach grid steps before the output index
+    index = np.arange(len(positions) + reach)
+    front = {1: index * step, -1: (index - reach) * step}
+    kernels = {1: kernel, -1: kernel[::-1]}
+
+    # A unit load on a station counts as left of it. Once it has passed, the
+    # shear there is larger by the load itself, so that limit is enveloped
+    # too. It is the whole train nudged right, which takes an axle at the
+    # right end off the beam, so that axle adds nothing to the passing line.
+    passing = np.abs(positions[np.newaxis, :] - stations[:, np.newaxis]) <= _STATION_TOLERANCE * beam.L
+    shear_passing = lines['shear'] + passing
+    shear_passing[:, -1] = 0.0
+    variants = {'shear': (lines['shear'], shear_passing),
+                'bending_moment': (lines['bending_moment'],)}
+
+    results = {'stations': stations}
+    for name, name_lines in variants.items():
+        effects = {direction: [_convolve_rows(line, kernels[direction]) for line in name_lines]
+                   for direction in kernels}
+        for bound, reduce, pick in (('max', np.maximum, np.argmax), ('min', np.minimum, np.argmin)):
+            best, value = {}, {}
+            for direction in kernels:
+                effect = reduce.reduce(effects[direction])
+                best[direction] = pick(effect, axis=1)
+                value[direction] = np.take_along_axis(effect, best[direction][:, np.newaxis], axis=1)[:, 0]
+            forward = value[1] >= value[-1] if bound == 'max' else value[1] <= value[-1]
+            results[f'{name}_{bound}'] = np.where(forward, value[1], value[-1])
+            results[f'{name}_{bound}_position'] = np.where(forward, front[1][best[1]], front[-1][best[-1]])
+            results[f'{name}_{bound}_direction'] = np.where(forward, 1, -1)
+
+    logging.info(f"Moving load envelope: {len(axle_loads)} axles over {len(positions)} positions "
+                 f"at {len(stations)} stations")
+    return results
@@ -0,0 +1,235 @@
+import io
+import sys
+import time
+import random
+import functools
+import logging
+import pstats
+import cProfile
+import threading
+import contextvars
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Trace of the request running in the current thread or task, if any
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+# Upper bounds in seconds of the histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTrace:
+    """
+    Stage timings of one traced request.
+
+    stages maps a stage name to its accumulated wall time, CPU time (of
+    the thread), net allocated memory blocks and number of calls; a stage
+    entered several times, such as savefig once per plot, adds up.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def add(self, stage, wall, cpu, allocs):
+        timing = self.stages.get(stage)
+        if timing is None:
+            timing = self.stages[stage] = {'wall': 0.0, 'cpu': 0.0, 'allocs': 0, 'calls': 0}
+        timing['wall'] += wall
+        timing['cpu'] += cpu
+        timing['allocs'] += allocs
+        timing['calls'] += 1
+
+
+@contextmanager
+def stage(name):
+    """
+    Time a stage of the current request.
+
+    Outside a traced request this does nothing, so library code such as
+    BeamCalculator can mark its stages unconditionally. Allocation counts
+    are the change in sys.getallocatedblocks(), which covers the whole
+    process and is only indicative when requests run concurrently.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    allocs = sys.getallocatedblocks()
+    cpu = time.thread_time()
+    wall = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - wall, time.thread_time() - cpu,
+                  sys.getallocatedblocks() - allocs)
+
+
+class LogSink:
+    """Log one line per request with the time of each stage"""
+
+    def __init__(self, level=logging.DEBUG):
+        self.level = level
+
+    def record(self, trace):
+        stages = ', '.join(f"{name}={timing['wall'] * 1000:.1f}ms" for name, timing in trace.stages.items())
+        logging.log(self.level, f"{trace.name} took {trace.wall * 1000:.1f}ms "
+                                f"(cpu {trace.cpu * 1000:.1f}ms): {stages}")
+
+
+class HistogramSink:
+    """
+    In-memory histograms of request and stage wall times.
+
+    Keeps cumulative counts per bucket together with total wall time, CPU
+    time and allocated blocks for every (request, stage) pair; the whole
+    request is recorded as stage 'total'. prometheus_text() renders them
+    in the Prometheus text exposition format.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, key, wall, cpu, allocs):
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {
+                'buckets': [0] * (len(self.buckets) + 1),
+                'count': 0, 'wall': 0.0, 'cpu': 0.0, 'allocs': 0,
+            }
+        series['buckets'][bisect_left(self.buckets, wall)] += 1
+        series['count'] += 1
+        series['wall'] += wall
+        series['cpu'] += cpu
+        series['allocs'] += allocs
+
+    def record(self, trace):
+        with self._lock:
+            for name, timing in trace.stages.items():
+                self._observe((trace.name, name), timing['wall'], timing['cpu'], timing['allocs'])
+            self._observe((trace.name, 'total'), trace.wall, trace.cpu, 0)
+
+    def snapshot(self):
+        """Copy of the histograms keyed by (request, stage)"""
+        with self._lock:
+            return {key: dict(series, buckets=list(series['buckets']))
+                    for key, series in self._series.items()}
+
+    def quantile(self, request, stage, q):
+        """Upper bucket bound below which a fraction q of the observations fall, or None"""
+        series = self.snapshot().get((request, stage))
+        if not series:
+            return None
+        target = q * series['count']
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), series['buckets']):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def prometheus_text(self):
+        lines = [
+            '# HELP beam_stage_seconds Wall time of request stages',
+            '# TYPE beam_stage_seconds histogram',
+        ]
+        totals = []
+        for (request, stage_name), series in sorted(self.snapshot().items()):
+            labels = f'request="{request}",stage="{stage_name}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series['buckets']):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'beam_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'beam_stage_seconds_sum{{{labels}}} {series["wall"]}')
+            lines.append(f'beam_stage_seconds_count{{{labels}}} {series["count"]}')
+            totals.append((labels, series))
+
+        lines.append('# HELP beam_stage_cpu_seconds_total CPU time of request stages')
+        lines.append('# TYPE beam_stage_cpu_seconds_total counter')
+        lines.extend(f'beam_stage_cpu_seconds_total{{{labels}}} {series["cpu"]}' for labels, series in totals)
+        lines.append('# HELP beam_stage_allocated_blocks_total Net memory blocks allocated by request stages')
+        lines.append('# TYPE beam_stage_allocated_blocks_total counter')
+        lines.extend(f'beam_stage_allocated_blocks_total{{{labels}}} {series["allocs"]}'
+                     for labels, series in totals if not labels.endswith('stage="total"'))
+        return '\n'.join(lines) + '\n'
+
+
+class Instrumentation:
+    """
+    Request tracing with pluggable sinks and sampled profiling.
+
+    Wrap a request in trace(name); stages marked with stage() while it
+    runs are collected and every sink's record(trace) is called when it
+    ends. A fraction profile_rate of requests also runs under cProfile,
+    and the profile is kept (and logged) when the request took at least
+    outlier_seconds, so slow requests come with a breakdown by function.
+    """
+
+    def __init__(self, sinks=(), profile_rate=0.0, outlier_seconds=1.0, max_profiles=20):
+        self.sinks = list(sinks)
+        self.profile_rate = profile_rate
+        self.outlier_seconds = outlier_seconds
+        self.profiles = deque(maxlen=max_profiles)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def sink(self, kind):
+        """The first sink of the given class, or None"""
+        return next((sink for sink in self.sinks if isinstance(sink, kind)), None)
+
+    @contextmanager
+    def trace(self, name):
+        trace = RequestTrace(name)
+        token = _current_trace.set(trace)
+        profiler = None
+        if self.profile_rate and random.random() < self.profile_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                profiler = None
+
+        cpu = time.thread_time()
+        wall = time.perf_counter()
+        try:
+            yield trace
+        finally:
+            trace.wall = time.perf_counter() - wall
+            trace.cpu = time.thread_time() - cpu
+            if profiler is not None:
+                profiler.disable()
+                if trace.wall >= self.outlier_seconds:
+                    self._keep_profile(trace, profiler)
+            _current_trace.reset(token)
+
+            for sink in self.sinks:
+                try:
+                    sink.record(trace)
+                except Exception as e:
+                    logging.error(f"Metrics sink {type(sink).__name__} failed: {e}")
+
+    def traced(self, name):
+        """Decorator running a function, such as a Flask view, under trace(name)"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.trace(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _keep_profile(self, trace, profiler):
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+        self.profiles.append({'request': trace.name, 'seconds': trace.wall,
+                              'time': time.time(), 'profile': output.getvalue()})
+        logging.warning(f"Slow {trace.name} request ({trace.wall:.3f}s) profiled:\n{output.getvalue()}")
@@ -0,0 +1,164 @@
+import numpy as np
+import logging
+
+from instrumentation import stage
+
+# Load cases offered by the input form, in display order
+LOAD_CASES = ('dead', 'live', 'snow', 'wind')
+
+# Basic strength combinations (ASCE 7 LRFD, without earthquake and rain);
+# a combination applies when at least one of its cases carries loads
+DEFAULT_COMBINATIONS = {
+    '1.4D': {'dead': 1.4},
+    '1.2D + 1.6L + 0.5S': {'dead': 1.2, 'live': 1.6, 'snow': 0.5},
+    '1.2D + 1.6S + L': {'dead': 1.2, 'snow': 1.6, 'live': 1.0},
+    '1.2D + 1.6S + 0.5W': {'dead': 1.2, 'snow': 1.6, 'wind': 0.5},
+    '1.2D + W + L + 0.5S': {'dead': 1.2, 'wind': 1.0, 'live': 1.0, 'snow': 0.5},
+    '0.9D + W': {'dead': 0.9, 'wind': 1.0},
+}
+
+
+class LoadCombinations:
+    """
+    Factored load combinations of one beam, evaluated by superposition.
+
+    cases maps each load case name to a loaded calculator; all of them must
+    describe the same beam. solve() analyses every case once at a common set
+    of stations and stacks its reactions, shear, moment and deflection into
+    basis arrays. Each combination is a row of the factor matrix, so all
+    combinations together cost one matrix product.
+    """
+
+    def __init__(self, cases, combinations=None):
+        self.cases = dict(cases)
+        if not self.cases:
+            raise ValueError("At least one load case is required")
+        self.case_names = list(self.cases)
+        first = self.cases[self.case_names[0]]
+        for name, calculator in self.cases.items():
+            if (calculator.L, calculator.EI, calculator.support_type) != (first.L, first.EI, first.support_type):
+                raise ValueError(f"Load case {name} is on a different beam")
+
+        if combinations is None:
+            combinations = {name: factors for name, factors in DEFAULT_COMBINATIONS.items()
+                            if set(factors) & set(self.case_names)}
+        self.combinations = {name: dict(factors) for name, factors in combinations.items()}
+        if not self.combinations:
+            raise ValueError("No load combination uses the given load cases")
+        self.combination_names = list(self.combinations)
+        self.factors = np.array([[factors.get(case, 0.0) for case in self.case_names]
+                                 for factors in self.combinations.values()])
+
+        # Filled in by solve(): one row per combination, one column per station
+        self.x_points = None
+        self.shear_force = None
+        self.bending_moment = None
+        self.deflection = None
+        self.reactions = None
+        self.max_moment = None
+        self.max_shear = None
+        self.max_deflection = None
+
+    def solve(self, n_stations=201):
+        """Analyse each load case once and combine them all"""
+        with stage('combinations'):
+            calculators = list(self.cases.values())
+            # Every case's load breaks and zero-shear points are stations of
+            # the basis, so shear is linear between stations in any combination
+            x = np.unique(np.concatenate([c.analysis_stations(n_stations) for c in calculators]))
+
+            basis_shear = np.stack([c.shear_force_array(x) for c in calculators])
+            basis_moment = np.stack([c.bending_moment_array(x) for c in calculators])
+            basis_deflection = np.stack([c.slope_and_deflection_array(x)[1] for c in calculators])
+            case_reactions = [c.calculate_reactions() for c in calculators]
+            reaction_names = list(case_reactions[0])
+            basis_reactions = np.array([[reactions[name] for name in reaction_names]
+                                        for reactions in case_reactions])
+
+            self.x_points = x
+            self.shear_force = self.factors @ basis_shear
+            self.bending_moment = self.factors @ basis_moment
+            self.deflection = self.factors @ basis_deflection
+            combined_reactions = self.factors @ basis_reactions
+            self.reactions = {name: combined_reactions[:, i] for i, name in enumerate(reaction_names)}
+
+            self.max_shear = np.max(np.abs(self.shear_force), axis=1)
+            self.max_moment = np.max(np.abs(self._moment_peaks()), axis=1)
+            self.max_deflection = np.max(np.abs(self.deflection), axis=1)
+
+        logging.info(f"Solved {len(self.case_names)} load cases into {len(self.combination_names)} combinations")
+        return self
+
+    def _moment_peaks(self):
+        """
+        Moments at the stations plus the peak between every pair of stations
+        where a combination's shear changes sign.
+
+        Shear is linear between stations, so the moment is a parabola there
+        whose vertex follows from the end values. Cantilever moments are
+        hogging-positive, so they fall with the shear instead of rising.
+        """
+        V, M, x = self.shear_force, self.bending_moment, self.x_points
+        direction = -1.0 if self.cases[self.case_names[0]].support_type == 'cantilever' else 1.0
+        V_left, V_right = V[:, :-1], V[:, 1:]
+        crossing = np.sign(V_left) * np.sign(V_right) < 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            run = np.diff(x) * V_left / (V_left - V_right)
+        peaks = np.where(crossing, M[:, :-1] + direction * V_left * run / 2, M[:, :-1])
+        return np.concatenate((M, peaks), axis=1)
+
+    def envelope(self, name):
+        """Max / min over combinations of 'shear_force', 'bending_moment' or 'deflection' at each station"""
+        values = getattr(self, name)
+        rows = np.arange(values.shape[1])
+        high, low = np.argmax(values, axis=0), np.argmin(values, axis=0)
+        names = np.array(self.combination_names, dtype=object)
+        return {'max': values[high, rows], 'max_combination': names[high],
+                'min': values[low, rows], 'min_combination': names[low]}
+
+    def combined(self, name):
+        """A calculator carrying the factored loads of every case for one combination"""
+        factors = self.combinations[name]
+        calculator = self.cases[self.case_names[0]].empty_copy()
+        for case, factor in factors.items():
+            if case not in self.cases or factor == 0:
+                continue
+            P, a, w, s, e = self.cases[case].load_columns()
+            if len(P):
+                calculator.add_point_loads(factor * P, a)
+            if len(w):
+                calculator.add_distributed_loads(factor * w, s, e - s)
+            for positions, intensities in self.cases[case].profile_loads:
+                calculator.add_sampled_load(positions, factor * intensities)
+        return calculator
+
+    def governing(self, quantity='max_moment'):
+        """Name of the combination with the largest max_moment, max_shear or max_deflection"""
+        return self.combination_names[int(np.argmax(getattr(self, quantity)))]
+
+    def get_results(self):
+        """Per-combination maxima, governing combinations and the reaction envelope"""
+        combinations = []
+        for i, name in enumerate(self.combination_names):
+            combinations.append({
+                'name': name,
+                'factors': self.combinations[name],
+                'max_moment': float(self.max_moment[i]),
+                'max_shear': float(self.max_shear[i]),
+                'max_deflection': float(self.max_deflection[i]),
+                'reactions': {key: float(values[i]) for key, values in self.reactions.items()},
+            })
+
+        reactions = {}
+        for key, values in self.reactions.items():
+            high, low = int(np.argmax(values)), int(np.argmin(values))
+            reactions[key] = {'max': float(values[high]), 'max_combination': self.combination_names[high],
+                              'min': float(values[low]), 'min_combination': self.combination_names[low]}
+
+        return {
+            'cases': self.case_names,
+            'combinations': combinations,
+            'governing': {quantity: self.governing(quantity)
+                          for quantity in ('max_moment', 'max_shear', 'max_deflection')},
+            'reactions': reactions,
+        }
@@ -0,0 +1,330 @@
+import io
+import threading
+
+import numpy as np
+
+from instrumentation import stage
+
+PLOT_NAMES = ('shear_force', 'bending_moment', 'deflection', 'beam_diagram')
+
+# Diagram name -> (line style, legend label, y axis label, title)
+DIAGRAM_STYLES = {
+    'shear_force': ('b-', 'Shear Force', 'Shear Force (N)', 'Shear Force Diagram (SFD)'),
+    'bending_moment': ('r-', 'Bending Moment', 'Bending Moment (Nm)', 'Bending Moment Diagram (BMD)'),
+    'deflection': ('g-', 'Deflection', 'Deflection (m)', 'Beam Deflection Curve'),
+}
+
+# Output format -> MIME type. 'png-optimized' is a 64-colour palette PNG,
+# about a third of the size of a full-colour one for these line plots;
+# 'webp' is lossless; 'svg' keeps text as text and has no timestamp, so
+# the same plot always gives the same bytes.
+IMAGE_FORMATS = {
+    'png': 'image/png',
+    'png-optimized': 'image/png',
+    'webp': 'image/webp',
+    'svg': 'image/svg+xml',
+}
+
+_SVG_RC = {'svg.fonttype': 'none', 'svg.hashsalt': 'beam-calculator'}
+
+# Beam diagram margins in inches around the equal-aspect axes
+_BEAM_MARGINS = {'left': 0.55, 'right': 0.15, 'bottom': 0.5, 'top': 0.35}
+# Tallest beam diagram (inches), that of the 12x4 figure generate_plots draws it on
+_BEAM_MAX_HEIGHT = 4.0
+
+
+def plot_payload(calculator):
+    """Plain, picklable data needed to draw a calculated beam's plots"""
+    return {
+        'L': calculator.L,
+        'support_type': calculator.support_type,
+        'x': calculator.x_points,
+        'shear_force': calculator.shear_force,
+        'bending_moment': calculator.bending_moment,
+        'deflection': calculator.deflection,
+        'point_loads': list(calculator.point_loads),
+        'distributed_loads': list(calculator.distributed_loads),
+        'profile_loads': [(positions.tolist(), intensities.tolist())
+                          for positions, intensities in calculator.profile_loads],
+        'supports': getattr(calculator, 'supports', None),
+    }
+
+
+def style_diagram_axes(ax, name, x, y):
+    """Draw one result diagram (SFD, BMD or deflection) on ax and return its line"""
+    style, label, ylabel, title = DIAGRAM_STYLES[name]
+    line, = ax.plot(x, y, style, linewidth=2, label=label)
+    ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
+    ax.grid(True, alpha=0.3)
+    ax.set_xlabel('Position along beam (m)')
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.legend()
+    return line
+
+
+def _default_supports(length, support_type):
+    """(kind, position) supports of the statically determinate beam types"""
+    if support_type == 'cantilever':
+        return [('fixed', 0.0)]
+    return [('pin', 0.0), ('pin', length)]
+
+
+def draw_beam_loads(ax, length, support_type, point_loads, distributed_loads, supports=None, profile_loads=()):
+    """
+    Draw the beam, its supports and its loads on ax and return the artists added.
+
+    supports is a list of (kind, position) with kind 'pin' or 'fixed'; by
+    default it follows support_type. profile_loads are (positions,
+    intensities) of linear and sampled loads, drawn to scale with each other.
+    """
+    from matplotlib.patches import Rectangle
+    artists = []
+
+    # Draw beam
+    artists += ax.plot([0, length], [0, 0], 'k-', linewidth=8, label='Beam')
+
+    # Draw supports
+    if supports is None:
+        supports = _default_supports(length, support_type)
+    for kind, position in supports:
+        if kind == 'fixed':
+            # Fixed support: wall block at the support
+            artists += ax.plot([position, position], [-0.1, 0.1], 'k-', linewidth=6)
+            artists.append(ax.add_patch(Rectangle((position - 0.05, -0.15), 0.1, 0.3,
+                                                  facecolor='gray', edgecolor='black')))
+        else:
+            # Pinned support
+            artists += ax.plot([position, position], [-0.1, 0], 'k-', linewidth=4)
+            artists += ax.plot([position - 0.05, position + 0.05], [-0.1, -0.1], 'k-', linewidth=4)
+
+    # Draw point loads
+    for P, pos in point_loads:
+        artists.append(ax.annotate('', xy=(pos, 0), xytext=(pos, 0.3),
+                                   arrowprops=dict(arrowstyle='->', color='red', lw=2)))
+        artists.append(ax.text(pos, 0.35, f'{P}N', ha='center', va='bottom', color='red', fontweight='bold'))
+
+    # Draw distributed loads
+    for w, start, end in distributed_loads:
+        x_dist = np.linspace(start, end, 20)
+        y_dist = np.full_like(x_dist, 0.2)
+        artists += ax.plot(x_dist, y_dist, 'b-', linewidth=3)
+        # Draw arrows
+        for x in x_dist[::3]:
+            artists.append(ax.annotate('', xy=(x, 0), xytext=(x, 0.2),
+                                       arrowprops=dict(arrowstyle='->', color='blue', lw=1)))
+        artists.append(ax.text((start + end) / 2, 0.25, f'{w}N/m', ha='center', va='bottom',
+                               color='blue', fontweight='bold'))
+
+    # Draw linear and sampled loads as their intensity outline
+    peak = max((np.max(np.abs(intensities)) for _, intensities in profile_loads), default=0)
+    for positions, intensities in profile_loads:
+        positions = np.asarray(positions)
+        heights = 0.2 * np.abs(intensities) / peak if peak else np.zeros(len(positions))
+        artists.append(ax.fill_between(positions, 0, heights, color='purple', alpha=0.2))
+        artists += ax.plot(positions, heights, '-', color='purple', linewidth=2)
+        for x in np.linspace(positions[0], positions[-1], 7):
+            height = np.interp(x, positions, heights)
+            if height > 0.02:
+                artists.append(ax.annotate('', xy=(x, 0), xytext=(x, height),
+                                           arrowprops=dict(arrowstyle='->', color='purple', lw=1)))
+        artists.append(ax.text((positions[0] + positions[-1]) / 2, 0.25, f'max {float(np.max(np.abs(intensities)))}N/m',
+                               ha='center', va='bottom', color='purple', fontweight='bold'))
+
+    ax.set_xlim(-length * 0.1, length * 1.1)
+    return artists
+
+
+def style_beam_axes(ax):
+    """Fixed decoration of the beam loading diagram"""
+    ax.set_ylim(-0.2, 0.5)
+    ax.set_xlabel('Position (m)')
+    ax.set_title('Beam Loading Diagram')
+    ax.grid(True, alpha=0.3)
+    ax.set_aspect('equal', adjustable='box')
+
+
+def save_figure(fig, stream, fmt='png', width=None):
+    """
+    Encode fig into a writable binary stream.
+
+    fmt is one of IMAGE_FORMATS. width is the target width in pixels of
+    raster output; by default the figure's own dpi decides it.
+    """
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {fmt}")
+    dpi = width / fig.get_figwidth() if width else 'figure'
+
+    if fmt == 'svg':
+        import matplotlib
+        with matplotlib.rc_context(_SVG_RC):
+            fig.savefig(stream, format='svg', metadata={'Date': None})
+    elif fmt == 'webp':
+        fig.savefig(stream, format='webp', dpi=dpi, pil_kwargs={'lossless': True})
+    elif fmt == 'png-optimized':
+        from PIL import Image
+        original_dpi = fig.dpi
+        if width:
+            fig.set_dpi(dpi)
+        try:
+            fig.canvas.draw()
+            image = Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[..., :3])
+        finally:
+            fig.set_dpi(original_dpi)
+        image.quantize(64).save(stream, format='png', optimize=True)
+    else:
+        fig.savefig(stream, format='png', dpi=dpi)
+
+
+def downsample_for_width(x, y, columns):
+    """
+    Reduce a series to what `columns` pixel columns can show.
+
+    Each column keeps its first, last, lowest and highest point, so peaks
+    and the vertical jumps at point loads survive exactly.
+    """
+    if len(x) <= 4 * columns or x[-1] == x[0]:
+        return x, y
+
+    bucket = np.minimum(((x - x[0]) / (x[-1] - x[0]) * columns).astype(int), columns - 1)
+    starts = np.flatnonzero(np.diff(bucket, prepend=-1))
+    ends = np.append(starts[1:], len(x)) - 1
+
+    # Sorting by (bucket, y) puts each bucket's minimum first and maximum last
+    order = np.lexsort((y, bucket))
+    lowest = order[starts]
+    highest = order[ends]
+
+    keep = np.unique(np.concatenate((starts, ends, lowest, highest)))
+    return x[keep], y[keep]
+
+
+class PlotRenderer:
+    """
+    Renders beam plots by reusing pre-built figures.
+
+    Each diagram figure is created and laid out once; a render only swaps in
+    the new line data and axis limits and saves without the bbox_inches='tight'
+    pass. Figures are plain Agg canvases outside pyplot's global state, so
+    every thread should use its own renderer (see get_renderer).
+    """
+
+    def __init__(self, dpi=150):
+        self.dpi = dpi
+        self._figures = {}
+        self._beam_artists = []
+
+    def render(self, payload, names=PLOT_NAMES, fmt='png', width=None):
+        """Render the named plots of a plot_payload and return their encoded bytes"""
+        return {name: self.render_one(payload, name, fmt, width) for name in names}
+
+    def render_one(self, payload, name, fmt='png', width=None):
+        """
+        Render one plot and return its encoded bytes.
+
+        getvalue() on a BytesIO nothing else references hands over its
+        buffer rather than copying it; getbuffer() would give a memoryview
+        that can neither be pickled back from a render worker nor served as
+        a response body. Use render_to to stream into a file or socket.
+        """
+        buffer = io.BytesIO()
+        self.render_to(buffer, payload, name, fmt, width)
+        return buffer.getvalue()
+
+    def render_to(self, stream, payload, name, fmt='png', width=None):
+        """Render one plot straight into a writable binary stream, such as a file or response"""
+        with stage('figure'):
+            fig = self.draw(payload, name)
+        with stage('savefig'):
+            save_figure(fig, stream, fmt, width)
+
+    def draw(self, payload, name):
+        """Update the template figure for one plot and return it"""
+        if name == 'beam_diagram':
+            return self._draw_beam_diagram(payload)
+        return self._draw_diagram(payload, name)
+
+    def _template(self, name):
+        fig = self._figures.get(name)
+        if fig is not None:
+            return fig
+
+        # matplotlib is only needed once figures are built, keep plot_payload importable without it
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.layout_engine import TightLayoutEngine
+
+        if name == 'beam_diagram':
+            fig = Figure(figsize=(10, 2), dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            style_beam_axes(fig.add_subplot())
+        else:
+            # Sized to match the tightly cropped 10x6 inch figures of generate_plots
+            fig = Figure(figsize=(8.6, 5.45), dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot()
+            style_diagram_axes(ax, name, [], [])
+            # Lay the figure out once, with room for wide tick labels, instead of
+            # running the tight bbox pass on every save. Executing the engine
+            # directly leaves no layout engine attached to trigger extra draws.
+            ax.set_ylim(-99999, 99999)
+            TightLayoutEngine(pad=0.4).execute(fig)
+        self._figures[name] = fig
+        return fig
+
+    def _draw_diagram(self, payload, name):
+        fig = self._template(name)
+        ax = fig.axes[0]
+        line = ax.lines[0]
+
+        y = np.asarray(payload[name])
+        x = np.asarray(payload['x'])[:len(y)]
+        columns = int(ax.get_position().width * fig.get_figwidth() * self.dpi)
+        line.set_data(*downsample_for_width(x, y, columns))
+
+        ax.relim()
+        ax.autoscale(True)
+        ax.autoscale_view()
+        if name == 'deflection' and np.min(y) != np.max(y):
+            # Exaggerate deflection for visibility
+            ax.set_ylim([np.min(y) * 1.1, np.max(y) * 1.1])
+        return fig
+
+    def _draw_beam_diagram(self, payload):
+        fig = self._template('beam_diagram')
+        ax = fig.axes[0]
+        for artist in self._beam_artists:
+            artist.remove()
+        self._beam_artists = draw_beam_loads(ax, payload['L'], payload['support_type'],
+                                             payload['point_loads'], payload['distributed_loads'],
+                                             payload.get('supports'), payload.get('profile_loads', ()))
+
+        # Size the figure to the equal-aspect axes so no tight bbox crop is
+        # needed. Short beams would make it very tall; like adjustable='box'
+        # on a fixed figure, they get narrower axes, centred, instead.
+        width = fig.get_figwidth()
+        full_width = width - _BEAM_MARGINS['left'] - _BEAM_MARGINS['right']
+        x_min, x_max = ax.get_xlim()
+        y_min, y_max = ax.get_ylim()
+        aspect = (y_max - y_min) / (x_max - x_min)
+        axes_height = min(full_width * aspect, _BEAM_MAX_HEIGHT - _BEAM_MARGINS['bottom'] - _BEAM_MARGINS['top'])
+        axes_width = axes_height / aspect
+        left = _BEAM_MARGINS['left'] + (full_width - axes_width) / 2
+        height = axes_height + _BEAM_MARGINS['bottom'] + _BEAM_MARGINS['top']
+        fig.set_size_inches(width, height)
+        fig.subplots_adjust(left=left / width, right=(left + axes_width) / width,
+                            bottom=_BEAM_MARGINS['bottom'] / height, top=1 - _BEAM_MARGINS['top'] / height)
+        return fig
+
+
+_local = threading.local()
+
+
+def get_renderer(dpi=150):
+    """Return this thread's PlotRenderer for the given dpi, creating it on first use"""
+    renderers = getattr(_local, 'renderers', None)
+    if renderers is None:
+        renderers = _local.renderers = {}
+    if dpi not in renderers:
+        renderers[dpi] = PlotRenderer(dpi)
+    return renderers[dpi]
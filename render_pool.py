@@ -0,0 +1,125 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# Same as plot_renderer.PLOT_NAMES, repeated so the web tier need not import matplotlib
+PLOT_NAMES = ('shear_force', 'bending_moment', 'deflection', 'beam_diagram')
+
+
+class RenderBusy(Exception):
+    """Raised when the render pool already has as many requests as it accepts"""
+
+
+class RenderTimeout(Exception):
+    """Raised when a render does not finish within the pool's timeout"""
+
+
+def _warm_worker(dpi):
+    """Process initializer: load matplotlib and build every figure template once"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import numpy as np
+    from plot_renderer import get_renderer
+
+    x = np.linspace(0.0, 1.0, 3)
+    payload = {'L': 1.0, 'support_type': 'simply_supported', 'x': x,
+               'shear_force': x, 'bending_moment': x, 'deflection': -x,
+               'point_loads': [(1.0, 0.5)], 'distributed_loads': []}
+    get_renderer(dpi).render(payload)
+
+
+def _render_plot(payload, name, fmt, dpi, width):
+    from plot_renderer import get_renderer
+    return get_renderer(dpi).render_one(payload, name, fmt, width)
+
+
+class RenderPool:
+    """
+    Bounded pool of worker processes rendering beam plots.
+
+    Each worker keeps a warm PlotRenderer, and the plots of one request
+    render in parallel on different workers. At most max_pending requests
+    are admitted at a time; render() raises RenderBusy straight away once
+    they are all taken rather than queueing without limit, and
+    RenderTimeout when the plots are not ready within timeout seconds, after
+    restarting the workers so the abandoned renders do not hold them.
+    """
+
+    def __init__(self, workers=None, max_pending=None, timeout=30, dpi=150, start_method='spawn'):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or 2 * self.workers
+        self.timeout = timeout
+        self.dpi = dpi
+        self.start_method = start_method
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_warm_worker, initargs=(self.dpi,))
+            return self._executor
+
+    def _reset_executor(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _terminate_executor(self, executor):
+        """Drop executor and kill its workers, abandoning the renders still running on them"""
+        # ProcessPoolExecutor cannot cancel running work, so its processes go
+        processes = list((getattr(executor, '_processes', None) or {}).values())
+        self._reset_executor(executor)
+        for process in processes:
+            process.terminate()
+
+    def render(self, payload, names=PLOT_NAMES, fmt='png', width=None):
+        """Render the named plots of a plot_payload in the pool and return their encoded bytes"""
+        if not self._slots.acquire(blocking=False):
+            raise RenderBusy(f"All {self.max_pending} render slots are in use")
+        try:
+            executor = self._get_executor()
+            try:
+                futures = {name: executor.submit(_render_plot, payload, name, fmt, self.dpi, width)
+                           for name in names}
+            except BrokenProcessPool:
+                # A worker died; start a fresh pool for this and later requests
+                logging.error("Render pool is broken, restarting it")
+                self._reset_executor(executor)
+                executor = self._get_executor()
+                futures = {name: executor.submit(_render_plot, payload, name, fmt, self.dpi, width)
+                           for name in names}
+
+            done, not_done = wait(futures.values(), timeout=self.timeout)
+            if not_done:
+                stuck = [future for future in not_done if not future.cancel()]
+                if stuck:
+                    # Running renders would keep their workers busy for later requests
+                    logging.error(f"{len(stuck)} renders timed out, restarting the render pool")
+                    self._terminate_executor(executor)
+                raise RenderTimeout(f"Rendering did not finish within {self.timeout}s")
+            return {name: future.result() for name, future in futures.items()}
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+            raise
+        finally:
+            self._slots.release()
+
+    def warm(self):
+        """Start the workers now instead of on the first request"""
+        executor = self._get_executor()
+        wait([executor.submit(os.getpid) for _ in range(self.workers)])
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,138 @@
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+def beam_cache_key(calculator):
+    """
+    Canonical hash of a loaded beam: (L, E, I, support type, supports, sorted loads).
+
+    Loads are sorted so the same loads entered in a different order share
+    a key, and every number is normalised through float() so "2.5" and
+    "2.50" from the form hash alike.
+    """
+    rigidity = calculator.rigidity
+    if callable(rigidity):
+        raise ValueError("A beam with EI given as a function has no cache key")
+    return beam_key(calculator.L, calculator.E, calculator.I, calculator.support_type,
+                    calculator.point_loads, calculator.distributed_loads,
+                    getattr(calculator, 'supports', ()), calculator.profile_loads, rigidity)
+
+
+def beam_key(length, young_modulus, moment_inertia, support_type, point_loads, distributed_loads, supports=(),
+             profile_loads=(), rigidity=None):
+    """
+    beam_cache_key from the beam's values: (magnitude, position) and
+    (magnitude, start, end) loads, (positions, intensities) linear and
+    sampled loads and an optional (positions, values) EI table. The last
+    two only enter the hash when present, so keys of other beams are stable.
+    """
+    canonical = {
+        'L': float(length),
+        'E': float(young_modulus),
+        'I': float(moment_inertia),
+        'support_type': support_type,
+        'supports': [(kind, float(position)) for kind, position in supports],
+        'point_loads': sorted((float(P), float(a)) for P, a in point_loads),
+        'distributed_loads': sorted((float(w), float(start), float(end))
+                                    for w, start, end in distributed_loads),
+    }
+    if len(profile_loads):
+        canonical['profile_loads'] = sorted(([float(x) for x in positions], [float(q) for q in intensities])
+                                            for positions, intensities in profile_loads)
+    if rigidity is not None:
+        canonical['rigidity'] = [[float(value) for value in column] for column in rigidity]
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def combinations_cache_key(combinations):
+    """Canonical hash of a LoadCombinations: the key of each case's beam and the combination factors"""
+    canonical = {
+        'cases': {name: beam_cache_key(calculator) for name, calculator in combinations.cases.items()},
+        'combinations': {name: {case: float(factor) for case, factor in factors.items()}
+                         for name, factors in combinations.combinations.items()},
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of rendered calculation results.
+
+    Each entry holds the encoded plot image bytes and the results
+    dictionary of one calculation. Entries are evicted least-recently-used first once
+    either max_entries or max_bytes (the total size of the stored images)
+    is exceeded.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (entry, size in bytes)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _entry_size(plots):
+        """Bytes held by an entry's encoded images"""
+        return sum(len(data) for data in plots.values())
+
+    def get(self, key):
+        """Return the cached {'plots', 'results'} entry for key, or None"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def peek(self, key):
+        """Return the entry for key like get, without counting a hit or miss or refreshing its LRU position"""
+        with self._lock:
+            item = self._entries.get(key)
+            return None if item is None else item[0]
+
+    def put(self, key, plots, results):
+        """Store a calculation's plots and results, evicting old entries as needed"""
+        size = self._entry_size(plots)
+        if size > self.max_bytes:
+            logging.debug(f"Result of {size} bytes is larger than the cache, not stored")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = ({'plots': plots, 'results': results}, size)
+            self.current_bytes += size
+
+            while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Counters for monitoring: entries, bytes, hits, misses and evictions"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,258 @@
+import os
+import json
+import logging
+
+import numpy as np
+
+from result_cache import beam_key
+
+# Per-beam diagram fields of analyze_batch(diagrams=True), one (beams, stations) file each
+DIAGRAM_FIELDS = ('x_points', 'shear_force', 'bending_moment', 'deflection')
+
+HEADER_FILE = 'store.json'
+KEY_DTYPE = np.dtype('S32')  # raw SHA-256 digest of the beam configuration
+
+
+def batch_keys(batch, rows=slice(None)):
+    """beam_key of each selected beam of a BeamBatch, ignoring zero-magnitude padding loads"""
+    keys = []
+    for i in np.arange(len(batch))[rows]:
+        point = [(P, a) for P, a in zip(batch.point_magnitudes[i], batch.point_positions[i]) if P != 0]
+        distributed = [(w, start, end) for w, start, end in zip(batch.distributed_magnitudes[i],
+                                                               batch.distributed_starts[i],
+                                                               batch.distributed_ends[i]) if w != 0]
+        keys.append(beam_key(batch.L[i], batch.E[i], batch.I[i], batch.support_types[i], point, distributed))
+    return keys
+
+
+class ResultStore:
+    """
+    Append-only on-disk store of beam results in fixed-layout binary files.
+
+    A store is a directory holding one raw float64 (beams, stations) file
+    per diagram field, a structured summary file of per-beam scalars
+    (reactions, maxima, ...) and the SHA-256 configuration key of every
+    beam, described by store.json. Readers memory-map the files, so slicing
+    rows or scanning one summary column never loads the rest. A sorted copy
+    of the keys makes lookups by configuration a binary search.
+
+    mode 'r' opens an existing store read-only; mode 'a' opens or creates
+    one for appending. Rows become visible to readers when flush() rewrites
+    the header, which append() does unless told otherwise.
+    """
+
+    def __init__(self, path, mode='r'):
+        if mode not in ('r', 'a'):
+            raise ValueError(f"Unknown store mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._views = {}
+        self._recent = {}  # key -> row, for rows appended since the index was last merged
+
+        header_path = os.path.join(path, HEADER_FILE)
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                self.header = json.load(f)
+            # Rows written after the last flush are discarded
+            if mode == 'a':
+                self._truncate(self.header['count'])
+        elif mode == 'a':
+            os.makedirs(path, exist_ok=True)
+            self.header = None
+        else:
+            raise FileNotFoundError(f"No result store at {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.header['count'] if self.header else 0
+
+    @property
+    def n_stations(self):
+        return self.header['n_stations'] if self.header else None
+
+    @property
+    def summary_fields(self):
+        return [name for name, _ in self.header['summary']] if self.header else []
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _summary_dtype(self):
+        return np.dtype([tuple(field) for field in self.header['summary']])
+
+    def _layout(self):
+        """(file, dtype, shape of one row) of every data file"""
+        files = [(f"{name}.f8", np.dtype(float), (self.n_stations,)) for name in self.header['diagrams']]
+        files.append(('summary.bin', self._summary_dtype(), ()))
+        files.append(('keys.bin', KEY_DTYPE, ()))
+        return files
+
+    def _truncate(self, count):
+        """Cut every data file back to count rows"""
+        for name, dtype, row_shape in self._layout():
+            with open(self._file(name), 'ab') as f:
+                f.truncate(count * dtype.itemsize * int(np.prod(row_shape)))
+
+    def _create(self, results):
+        """Fix the layout from the first appended results"""
+        diagrams = [name for name in DIAGRAM_FIELDS if name in results]
+        n_stations = results[diagrams[0]].shape[1] if diagrams else 0
+        summary = [(name, np.asarray(values).dtype.str) for name, values in results.items()
+                   if name not in DIAGRAM_FIELDS and np.ndim(values) == 1]
+        self.header = {'version': 1, 'n_stations': n_stations, 'diagrams': diagrams,
+                       'summary': summary, 'count': 0}
+        for name, _, _ in self._layout():
+            open(self._file(name), 'wb').close()
+        self._write_index(np.empty(0, dtype=KEY_DTYPE), np.empty(0, dtype=np.int64))
+
+    def append(self, results, keys, flush=True):
+        """
+        Append beams to the store and return the row of the first one.
+
+        results is a dict like analyze_batch(diagrams=True) returns: (beams,
+        stations) diagram arrays and (beams,) scalar arrays. keys are the
+        beams' configuration hashes (hex strings from beam_key).
+        """
+        if self.mode != 'a':
+            raise ValueError("Result store is open read-only")
+        if self.header is None:
+            self._create(results)
+        raw = [bytes.fromhex(key) for key in keys]
+        digests = np.array(raw, dtype=KEY_DTYPE)
+
+        summary = np.empty(len(digests), dtype=self._summary_dtype())
+        for name in summary.dtype.names:
+            summary[name] = results[name]
+        for name in self.header['diagrams']:
+            values = np.ascontiguousarray(results[name], dtype=float)
+            if values.shape != (len(digests), self.n_stations):
+                raise ValueError(f"{name} has shape {values.shape}, the store holds "
+                                 f"{self.n_stations} stations per beam")
+            with open(self._file(f"{name}.f8"), 'ab') as f:
+                f.write(values.tobytes())
+        with open(self._file('summary.bin'), 'ab') as f:
+            f.write(summary.tobytes())
+        with open(self._file('keys.bin'), 'ab') as f:
+            f.write(digests.tobytes())
+
+        first = self.header['count']
+        self._recent.update((digest, first + i) for i, digest in enumerate(raw))
+        self.header['count'] += len(digests)
+        self._views.clear()
+        if flush:
+            self.flush()
+        return first
+
+    def append_batch(self, batch, results, rows=slice(None), flush=True):
+        """Append analyze_batch results for the selected beams of a BeamBatch"""
+        return self.append(results, batch_keys(batch, rows), flush=flush)
+
+    def flush(self):
+        """Merge new keys into the sorted index and publish the appended rows"""
+        if self.mode != 'a' or self.header is None:
+            return
+        for name, _, _ in self._layout():
+            with open(self._file(name), 'ab') as f:
+                os.fsync(f.fileno())
+        if self._recent:
+            index_keys, index_rows = self._index()
+            new_keys = np.array(list(self._recent), dtype=KEY_DTYPE)
+            new_rows = np.array(list(self._recent.values()), dtype=np.int64)
+            order = np.argsort(new_keys, kind='stable')
+            at = np.searchsorted(index_keys, new_keys[order])
+            self._write_index(np.insert(index_keys, at, new_keys[order]),
+                              np.insert(index_rows, at, new_rows[order]))
+            self._recent.clear()
+        path = self._file(HEADER_FILE)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.header, f, indent=2)
+        os.replace(path + '.tmp', path)
+        self._views.clear()
+        logging.debug(f"Result store {self.path}: {len(self)} beams")
+
+    def close(self):
+        self.flush()
+        self._views.clear()
+
+    def _write_index(self, keys, rows):
+        for name, values in (('index_keys.bin', keys), ('index_rows.bin', rows)):
+            with open(self._file(name) + '.tmp', 'wb') as f:
+                f.write(values.tobytes())
+            os.replace(self._file(name) + '.tmp', self._file(name))
+        self._views.pop('index', None)
+
+    def _memmap(self, name, dtype, shape):
+        """Read-only memory map of a data file, or an empty array for an empty one"""
+        if not shape[0]:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode='r', shape=shape)
+
+    def _index(self):
+        """Sorted keys and their rows, memory-mapped"""
+        if 'index' not in self._views:
+            count = os.path.getsize(self._file('index_keys.bin')) // KEY_DTYPE.itemsize
+            self._views['index'] = (self._memmap('index_keys.bin', KEY_DTYPE, (count,)),
+                                    self._memmap('index_rows.bin', np.int64, (count,)))
+        return self._views['index']
+
+    def field(self, name):
+        """Memory-mapped (beams, stations) diagram or (beams,) summary column"""
+        if name not in self._views:
+            count = len(self)
+            if name in self.header['diagrams']:
+                self._views[name] = self._memmap(f"{name}.f8", float, (count, self.n_stations))
+            elif name == 'keys':
+                self._views[name] = self._memmap('keys.bin', KEY_DTYPE, (count,))
+            elif name in self.summary_fields:
+                return self.summary()[name]
+            else:
+                raise KeyError(name)
+        return self._views[name]
+
+    def summary(self):
+        """Memory-mapped structured array of every beam's scalar results"""
+        if 'summary' not in self._views:
+            self._views['summary'] = self._memmap('summary.bin', self._summary_dtype(), (len(self),))
+        return self._views['summary']
+
+    def rows(self, rows, fields=None):
+        """
+        The selected beams as a dict of arrays.
+
+        A slice gives zero-copy views of the mapped files; an index array
+        copies just those rows.
+        """
+        names = fields if fields is not None else self.header['diagrams'] + self.summary_fields
+        return {name: self.field(name)[rows] for name in names}
+
+    def find(self, key):
+        """Row of the beam with this configuration key, or None"""
+        digest = bytes.fromhex(key)
+        if digest in self._recent:
+            return self._recent[digest]
+        # Compare as S32 arrays: single elements read back without trailing zero bytes
+        target = np.array([digest], dtype=KEY_DTYPE)
+        index_keys, index_rows = self._index()
+        i = int(np.searchsorted(index_keys, target[0]))
+        if i < len(index_keys) and index_keys[i:i + 1] == target:
+            return int(index_rows[i])
+        return None
+
+    def largest(self, name, count=10):
+        """Rows of the count beams with the largest value of a summary field, largest first"""
+        values = self.field(name)
+        count = min(count, len(values))
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(values, len(values) - count)[len(values) - count:]
+        return top[np.argsort(values[top])[::-1]]
+
+    def iter_chunks(self, chunk_size=10000, fields=None):
+        """Yield consecutive slices of the store as dicts of zero-copy views"""
+        for first in range(0, len(self), chunk_size):
+            yield self.rows(slice(first, first + chunk_size), fields)
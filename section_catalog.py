@@ -0,0 +1,193 @@
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+from load_combinations import LoadCombinations
+
+# Material properties: Young's modulus (Pa), density (kg/m^3) and the
+# allowable bending stress (Pa). Plain concrete is left out: it needs
+# reinforcement to carry bending tension.
+MATERIALS = {
+    'steel': {'young_modulus': 200e9, 'density': 7850.0, 'allowable_stress': 250e6},
+    'aluminum': {'young_modulus': 70e9, 'density': 2700.0, 'allowable_stress': 240e6},
+    'wood': {'young_modulus': 12e9, 'density': 500.0, 'allowable_stress': 24e6},
+    'copper': {'young_modulus': 110e9, 'density': 8960.0, 'allowable_stress': 70e6},
+}
+
+# European IPE I-sections (steel): name, depth h (mm), flange width b (mm),
+# area (cm^2), second moment of area Iy (cm^4), elastic section modulus Wy (cm^3)
+IPE_SECTIONS = (
+    ('IPE 80', 80, 46, 7.64, 80.1, 20.0),
+    ('IPE 100', 100, 55, 10.3, 171.0, 34.2),
+    ('IPE 120', 120, 64, 13.2, 318.0, 53.0),
+    ('IPE 140', 140, 73, 16.4, 541.0, 77.3),
+    ('IPE 160', 160, 82, 20.1, 869.0, 109.0),
+    ('IPE 180', 180, 91, 23.9, 1317.0, 146.0),
+    ('IPE 200', 200, 100, 28.5, 1943.0, 194.0),
+    ('IPE 220', 220, 110, 33.4, 2772.0, 252.0),
+    ('IPE 240', 240, 120, 39.1, 3892.0, 324.0),
+    ('IPE 270', 270, 135, 45.9, 5790.0, 429.0),
+    ('IPE 300', 300, 150, 53.8, 8356.0, 557.0),
+    ('IPE 330', 330, 160, 62.6, 11770.0, 713.0),
+    ('IPE 360', 360, 170, 72.7, 16270.0, 904.0),
+    ('IPE 400', 400, 180, 84.5, 23130.0, 1156.0),
+    ('IPE 450', 450, 190, 98.8, 33740.0, 1500.0),
+    ('IPE 500', 500, 200, 116.0, 48200.0, 1928.0),
+    ('IPE 550', 550, 210, 134.0, 67120.0, 2441.0),
+    ('IPE 600', 600, 220, 156.0, 92080.0, 3069.0),
+)
+
+# Solid sections offered in every material (mm)
+RECTANGLE_WIDTHS = (50, 75, 100, 150, 200, 250, 300)
+RECTANGLE_HEIGHTS = (100, 150, 200, 250, 300, 350, 400, 450, 500, 600)
+ROUND_DIAMETERS = (20, 30, 40, 50, 60, 80, 100, 120, 150, 200, 250, 300)
+
+SHAPES = ('ipe', 'rectangle', 'round')
+
+
+def rectangular_section(width, height):
+    """Area, second moment of area and elastic section modulus of a solid rectangle (m)"""
+    return width * height, width * height**3 / 12, width * height**2 / 6
+
+
+def circular_section(diameter):
+    """Area, second moment of area and elastic section modulus of a solid circle (m)"""
+    return np.pi * diameter**2 / 4, np.pi * diameter**4 / 64, np.pi * diameter**3 / 32
+
+
+def _standard_sections():
+    """Every (name, shape, material, area, I, W) of the standard catalog, in SI units"""
+    for name, h, b, area, I, W in IPE_SECTIONS:
+        yield name, 'ipe', 'steel', area * 1e-4, I * 1e-8, W * 1e-6
+    for material in MATERIALS:
+        for width in RECTANGLE_WIDTHS:
+            for height in RECTANGLE_HEIGHTS:
+                if height >= width:
+                    yield (f'Rectangle {width}x{height}', 'rectangle', material,
+                           *rectangular_section(width / 1000, height / 1000))
+        for diameter in ROUND_DIAMETERS:
+            yield f'Round {diameter}', 'round', material, *circular_section(diameter / 1000)
+
+
+class SectionCatalog:
+    """
+    Sections and materials as parallel arrays sorted by flexural rigidity EI.
+
+    Deflection scales with 1/EI, so the sections stiff enough for a beam
+    are the tail of the arrays from one bisection; bending stress is then
+    checked for all of them at once.
+    """
+
+    def __init__(self, sections):
+        names, shapes, materials, area, I, W = zip(*sections)
+        E = np.array([MATERIALS[material]['young_modulus'] for material in materials])
+        density = np.array([MATERIALS[material]['density'] for material in materials])
+        allowable = np.array([MATERIALS[material]['allowable_stress'] for material in materials])
+        I = np.array(I, dtype=float)
+        order = np.argsort(E * I, kind='stable')
+
+        self.names = np.array(names, dtype=object)[order]
+        self.shapes = np.array(shapes, dtype=object)[order]
+        self.materials = np.array(materials, dtype=object)[order]
+        self.young_modulus = E[order]
+        self.moment_inertia = I[order]
+        self.EI = self.young_modulus * self.moment_inertia
+        self.section_modulus = np.array(W, dtype=float)[order]
+        self.area = np.array(area, dtype=float)[order]
+        self.mass_per_metre = density[order] * self.area
+        # Largest bending moment each section carries at its allowable stress
+        self.moment_capacity = allowable[order] * self.section_modulus
+
+    def __len__(self):
+        return len(self.names)
+
+    def lightest(self, max_moment, required_EI, count=5, materials=None, shapes=None):
+        """
+        Indices of the lightest sections with EI >= required_EI and enough
+        moment capacity, lightest first, optionally limited to some
+        materials and shapes.
+        """
+        first = np.searchsorted(self.EI, required_EI, side='left')
+        candidates = np.arange(first, len(self))
+        ok = self.moment_capacity[candidates] >= max_moment
+        if materials is not None:
+            ok &= np.isin(self.materials[candidates], list(materials))
+        if shapes is not None:
+            ok &= np.isin(self.shapes[candidates], list(shapes))
+        candidates = candidates[ok]
+        return candidates[np.argsort(self.mass_per_metre[candidates], kind='stable')[:count]]
+
+    def describe(self, i, max_moment=0.0, required_EI=0.0):
+        """One section as a dict, with its stress and deflection utilisation"""
+        return {
+            'name': self.names[i],
+            'shape': self.shapes[i],
+            'material': self.materials[i],
+            'young_modulus': float(self.young_modulus[i]),
+            'moment_inertia': float(self.moment_inertia[i]),
+            'section_modulus': float(self.section_modulus[i]),
+            'mass_per_metre': float(self.mass_per_metre[i]),
+            'stress_utilisation': float(max_moment / self.moment_capacity[i]),
+            'deflection_utilisation': float(required_EI / self.EI[i]),
+        }
+
+
+@lru_cache(maxsize=1)
+def standard_catalog():
+    """The built-in catalog, built once per process"""
+    return SectionCatalog(list(_standard_sections()))
+
+
+def _demands(analysis):
+    """Governing max moment, max deflection * EI and span of a calculator or LoadCombinations"""
+    beams = analysis.cases.values() if isinstance(analysis, LoadCombinations) else (analysis,)
+    if not all(beam.prismatic for beam in beams):
+        # Deflection only scales as 1/EI when EI is the same along the beam
+        raise ValueError("Section search needs a prismatic beam, without a varying EI")
+    if isinstance(analysis, LoadCombinations):
+        if analysis.max_moment is None:
+            analysis.solve()
+        beam = analysis.cases[analysis.case_names[0]]
+        return float(np.max(analysis.max_moment)), float(np.max(analysis.max_deflection)) * beam.EI, beam.L
+    if analysis.max_moment is None:
+        analysis.calculate()
+    return float(analysis.max_moment), float(analysis.max_deflection) * analysis.EI, analysis.L
+
+
+def optimize_section(analysis, deflection_limit=360, count=5, materials=None, shapes=None, catalog=None):
+    """
+    Lightest catalog sections for a loaded beam.
+
+    analysis is a calculator or LoadCombinations, solved once with its own
+    E and I. Bending moments do not depend on EI and max deflection * EI is
+    the same for every section, so the deflection limit L / deflection_limit
+    becomes a minimum EI; a beam with a varying EI (set_flexural_rigidity)
+    is rejected. The beam's self-weight is not included; add it as a
+    distributed load.
+
+    Returns a dict with the governing max_moment, the required_EI and the
+    matching sections, lightest first.
+    """
+    if catalog is None:
+        catalog = standard_catalog()
+    if deflection_limit <= 0:
+        raise ValueError("Deflection limit must be positive")
+    if count <= 0:
+        raise ValueError("Count must be positive")
+    unknown = (set(materials or ()) - set(MATERIALS)) | (set(shapes or ()) - set(SHAPES))
+    if unknown:
+        raise ValueError(f"Unknown material or shape: {sorted(unknown)[0]}")
+
+    max_moment, deflection_EI, L = _demands(analysis)
+    required_EI = deflection_EI * deflection_limit / L
+
+    chosen = catalog.lightest(max_moment, required_EI, count, materials, shapes)
+    logging.info(f"Section search: M={max_moment:.2f}Nm, EI>={required_EI:.3e}Nm^2, "
+                 f"{len(chosen)} of {len(catalog)} sections listed")
+    return {
+        'max_moment': max_moment,
+        'required_EI': required_EI,
+        'deflection_limit': deflection_limit,
+        'sections': [catalog.describe(i, max_moment, required_EI) for i in chosen],
+    }
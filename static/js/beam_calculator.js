@@ -97,6 +97,17 @@ function createLoadInputGroup() {
                 </button>
             </div>
         </div>
+        <div class="row">
+            <div class="col-md-3">
+                <label class="form-label">Load Case</label>
+                <select class="form-select" name="load_case[]">
+                    <option value="dead">Dead (D)</option>
+                    <option value="live">Live (L)</option>
+                    <option value="snow">Snow (S)</option>
+                    <option value="wind">Wind (W)</option>
+                </select>
+            </div>
+        </div>
     `;
     return div;
 }
@@ -263,9 +274,211 @@ function calculateCircularMomentInertia(diameter) {
     return (Math.PI * Math.pow(diameter, 4)) / 64;
 }
 
+// Diagram data helpers for client-side charts (/api/calculate)
+function collectBeamPayload(form) {
+    const loads = [];
+    form.querySelectorAll('.load-input-group').forEach(group => {
+        const type = group.querySelector('select[name="load_type[]"]').value;
+        loads.push({
+            type: type,
+            magnitude: parseFloat(group.querySelector('input[name="load_magnitude[]"]').value),
+            position: parseFloat(group.querySelector('input[name="load_position[]"]').value),
+            length: type === 'distributed'
+                ? parseFloat(group.querySelector('input[name="load_length[]"]').value)
+                : null,
+            case: group.querySelector('select[name="load_case[]"]').value
+        });
+    });
+    
+    const supportType = form.querySelector('input[name="support_type"]:checked');
+    const payload = {
+        beam_length: parseFloat(form.querySelector('#beam_length').value),
+        young_modulus: parseFloat(form.querySelector('#young_modulus').value),
+        moment_inertia: parseFloat(form.querySelector('#moment_inertia').value),
+        support_type: supportType ? supportType.value : 'simply_supported',
+        loads: loads
+    };
+
+    const positions = form.querySelector('#support_positions');
+    if (payload.support_type === 'continuous' && positions && positions.value.trim()) {
+        payload.supports = positions.value.split(/[\s,;]+/).filter(Boolean).map(parseFloat);
+    }
+    return payload;
+}
+
+function requestDiagramData(payload, options = {}) {
+    const body = Object.assign({}, payload, {
+        encoding: options.encoding || 'base64',
+        tolerance: options.tolerance === undefined ? 0.001 : options.tolerance
+    });
+    
+    return fetch('/api/calculate', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.message);
+            }
+            // Decode every series into plain number arrays
+            Object.values(data.diagrams).forEach(series => {
+                series.x = decodeSeries(series.x, data.encoding);
+                series.y = decodeSeries(series.y, data.encoding);
+            });
+            return data;
+        });
+}
+
+const PREVIEW_DIAGRAMS = {
+    shear_force: { title: 'Shear Force (N)', color: 'blue' },
+    bending_moment: { title: 'Bending Moment (Nm)', color: 'red' },
+    deflection: { title: 'Deflection (m)', color: 'green' }
+};
+
+function previewDiagrams() {
+    const form = document.getElementById('beamForm');
+    if (!validateForm()) {
+        return;
+    }
+
+    requestDiagramData(collectBeamPayload(form))
+        .then(data => {
+            document.getElementById('diagram-preview').style.display = 'block';
+            Object.entries(PREVIEW_DIAGRAMS).forEach(([name, options]) => {
+                drawDiagram(document.getElementById(`preview-${name}`), data.diagrams[name], options);
+            });
+        })
+        .catch(error => showError(error.message));
+}
+
+// Lightest catalog sections for the entered loads (/api/optimize-section)
+function requestSectionOptimization(payload, options = {}) {
+    const body = Object.assign({}, payload, {
+        deflection_limit: options.deflectionLimit || 360,
+        count: options.count || 5
+    });
+    if (options.materials) {
+        body.materials = options.materials;
+    }
+    if (options.shapes) {
+        body.shapes = options.shapes;
+    }
+    
+    return fetch('/api/optimize-section', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.message);
+            }
+            return data;
+        });
+}
+
+function applySection(section) {
+    document.getElementById('young_modulus').value = section.young_modulus;
+    document.getElementById('moment_inertia').value = section.moment_inertia;
+}
+
+function suggestSections() {
+    const form = document.getElementById('beamForm');
+
+    requestSectionOptimization(collectBeamPayload(form))
+        .then(data => {
+            const body = document.getElementById('section-suggestions-body');
+            body.innerHTML = '';
+            if (data.sections.length === 0) {
+                body.innerHTML = '<tr><td colspan="6" class="text-muted">No catalog section is strong and stiff enough.</td></tr>';
+            }
+            data.sections.forEach(section => {
+                const row = document.createElement('tr');
+                row.innerHTML = `
+                    <td>${section.name}</td>
+                    <td>${section.material}</td>
+                    <td class="text-end">${section.mass_per_metre.toFixed(1)}</td>
+                    <td class="text-end">${(100 * section.stress_utilisation).toFixed(0)}%</td>
+                    <td class="text-end">${(100 * section.deflection_utilisation).toFixed(0)}%</td>
+                    <td class="text-end">
+                        <button type="button" class="btn btn-sm btn-outline-primary">Use</button>
+                    </td>
+                `;
+                row.querySelector('button').addEventListener('click', () => applySection(section));
+                body.appendChild(row);
+            });
+            document.getElementById('section-suggestions').style.display = 'block';
+        })
+        .catch(error => showError(error.message));
+}
+
+function decodeSeries(values, encoding) {
+    if (encoding !== 'base64') {
+        return values;
+    }
+    // Little-endian float32 bytes
+    const bytes = Uint8Array.from(atob(values), c => c.charCodeAt(0));
+    return Array.from(new Float32Array(bytes.buffer));
+}
+
+function drawDiagram(canvas, series, options = {}) {
+    const ctx = canvas.getContext('2d');
+    const width = canvas.width;
+    const height = canvas.height;
+    const padding = 40;
+    
+    const xMin = Math.min(...series.x);
+    const xMax = Math.max(...series.x);
+    const yMin = Math.min(0, ...series.y);
+    const yMax = Math.max(0, ...series.y);
+    const xScale = (width - 2 * padding) / ((xMax - xMin) || 1);
+    const yScale = (height - 2 * padding) / ((yMax - yMin) || 1);
+    const toX = x => padding + (x - xMin) * xScale;
+    const toY = y => height - padding - (y - yMin) * yScale;
+    
+    ctx.clearRect(0, 0, width, height);
+    
+    // Zero line
+    ctx.strokeStyle = 'rgba(0, 0, 0, 0.3)';
+    ctx.lineWidth = 1;
+    ctx.beginPath();
+    ctx.moveTo(padding, toY(0));
+    ctx.lineTo(width - padding, toY(0));
+    ctx.stroke();
+    
+    // Diagram
+    ctx.strokeStyle = options.color || 'blue';
+    ctx.lineWidth = 2;
+    ctx.beginPath();
+    series.x.forEach((x, i) => {
+        if (i === 0) {
+            ctx.moveTo(toX(x), toY(series.y[i]));
+        } else {
+            ctx.lineTo(toX(x), toY(series.y[i]));
+        }
+    });
+    ctx.stroke();
+    
+    if (options.title) {
+        ctx.fillStyle = 'black';
+        ctx.textAlign = 'center';
+        ctx.fillText(options.title, width / 2, padding / 2);
+    }
+}
+
 // Export functions for global access
 window.addLoad = addLoad;
 window.removeLoad = removeLoad;
 window.setMaterialProperties = setMaterialProperties;
 window.calculateRectangularMomentInertia = calculateRectangularMomentInertia;
 window.calculateCircularMomentInertia = calculateCircularMomentInertia;
+window.collectBeamPayload = collectBeamPayload;
+window.requestDiagramData = requestDiagramData;
+window.requestSectionOptimization = requestSectionOptimization;
+window.applySection = applySection;
+window.suggestSections = suggestSections;
+window.drawDiagram = drawDiagram;
+window.previewDiagrams = previewDiagrams;
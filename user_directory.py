@@ -0,0 +1,223 @@
+import re
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+
+def _column_letter(n):
+    """Spreadsheet column letter of the 1-based column n (1 -> A, 27 -> AA)"""
+    letters = ''
+    while n > 0:
+        n, remainder = divmod(n - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+class UserDirectory(ABC):
+    """
+    Lookup and registration of application users.
+
+    Users are records with 'Name', 'Email' and 'Password' (a password hash)
+    fields; emails are matched case-insensitively.
+    """
+
+    @abstractmethod
+    def find(self, email):
+        """Return the user record for email, or None"""
+
+    @abstractmethod
+    def add(self, name, email, password_hash):
+        """Register a new user and return its record"""
+
+
+class SheetsUserDirectory(UserDirectory):
+    """
+    User directory backed by a worksheet, served from an in-process index.
+
+    The sheet is read once into a dict keyed by lower-cased email. After
+    that only the rows below the last one seen are fetched: when ttl
+    seconds have passed, after a signup appended directly, or when an
+    email is not found (at most once per miss_interval seconds, so a user
+    who just signed up through another process can log in). A full reload every full_ttl
+    seconds picks up rows edited or deleted in the sheet itself.
+
+    worksheet is a gspread Worksheet or anything with the same
+    get_all_values, get_values and append_row methods, such as
+    InMemoryWorksheet. With a writer (an auth_workers.SheetWriteQueue on
+    the same worksheet) signups are queued for batched writing instead of
+    appended one request at a time; rows still in the queue stay indexed
+    across reloads.
+    """
+
+    def __init__(self, worksheet, ttl=60, full_ttl=900, miss_interval=5, writer=None):
+        self.worksheet = worksheet
+        self.writer = writer
+        self.ttl = ttl
+        self.full_ttl = full_ttl
+        self.miss_interval = miss_interval
+        self._lock = threading.Lock()
+        self._headers = None
+        self._users = {}
+        self._rows_read = 0
+        self._loaded_at = None
+        self._refreshed_at = None
+        self._stale = False
+
+    def _index(self, rows):
+        for row in rows:
+            record = dict(zip(self._headers, row))
+            email = str(record.get('Email', '')).strip().lower()
+            if email:
+                self._users[email] = record
+        self._rows_read += len(rows)
+
+    def reload(self):
+        """Read the whole sheet and rebuild the index"""
+        with self._lock:
+            self._reload()
+
+    def _reload(self):
+        values = self.worksheet.get_all_values()
+        self._headers = values[0] if values else ['Name', 'Email', 'Password']
+        self._users = {}
+        self._rows_read = 0
+        self._index(values[1:])
+        if self.writer is not None:
+            # Signups not yet in the sheet; the row count covers sheet rows only
+            read = self._rows_read
+            self._index(self.writer.pending())
+            self._rows_read = read
+        self._loaded_at = self._refreshed_at = time.monotonic()
+        self._stale = False
+        logging.debug(f"User directory loaded {len(self._users)} users")
+
+    def refresh(self):
+        """Index the rows appended to the sheet since the last read"""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        # Row 1 holds the headers, data row i is sheet row i + 2
+        first_row = self._rows_read + 2
+        last_column = _column_letter(len(self._headers))
+        rows = self.worksheet.get_values(f"A{first_row}:{last_column}")
+        self._index(rows)
+        self._refreshed_at = time.monotonic()
+        self._stale = False
+        if rows:
+            logging.debug(f"User directory indexed {len(rows)} new rows")
+
+    def _needs_reload(self, now):
+        return self._loaded_at is None or now - self._loaded_at > self.full_ttl
+
+    def _needs_refresh(self, now):
+        return self._stale or now - self._refreshed_at > self.ttl
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if not (self._needs_reload(now) or self._needs_refresh(now)):
+            return
+        with self._lock:
+            # Check again: the thread that held the lock may have fetched already
+            now = time.monotonic()
+            if self._needs_reload(now):
+                self._reload()
+            elif self._needs_refresh(now):
+                self._refresh()
+
+    def find(self, email):
+        email = email.strip().lower()
+        self._ensure_fresh()
+        user = self._users.get(email)
+        if user is None and time.monotonic() - self._refreshed_at > self.miss_interval:
+            with self._lock:
+                user = self._users.get(email)
+                if user is None and time.monotonic() - self._refreshed_at > self.miss_interval:
+                    self._refresh()
+                    user = self._users.get(email)
+        return user
+
+    def add(self, name, email, password_hash):
+        self._ensure_fresh()
+        record = {'Name': name, 'Email': email, 'Password': password_hash}
+        row = [record.get(header, '') for header in self._headers]
+        if self.writer is not None:
+            self.writer.put(row)
+        else:
+            self.worksheet.append_row(row)
+        with self._lock:
+            # Write through so the new user can log in at once. An appended
+            # row is read back by the next find, together with any others;
+            # a queued one is only in the sheet later, so the ttl refresh
+            # picks it up instead of costing a read per signup.
+            self._users[email.strip().lower()] = record
+            self._stale = self.writer is None
+        return record
+
+    def __len__(self):
+        self._ensure_fresh()
+        return len(self._users)
+
+
+class InMemoryWorksheet:
+    """
+    Local stand-in for a gspread Worksheet holding the user sheet.
+
+    Supports the calls SheetsUserDirectory and SheetWriteQueue make and
+    counts them in `calls`, so tests and benchmarks can run without Google
+    Sheets and check how many API requests a workload would cost. latency
+    seconds are slept on every call to mimic a remote sheet, and the next
+    fail_appends append calls raise ConnectionError to exercise retries.
+    """
+
+    def __init__(self, rows=None, headers=('Name', 'Email', 'Password'), latency=0.0, fail_appends=0):
+        self.rows = [list(headers)] + [list(row) for row in rows or []]
+        self.latency = latency
+        self.fail_appends = fail_appends
+        self.calls = {'get_all_values': 0, 'get_values': 0, 'append_row': 0, 'append_rows': 0}
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_all_values(self):
+        self._call('get_all_values')
+        with self._lock:
+            return [list(row) for row in self.rows]
+
+    def get_all_records(self):
+        values = self.get_all_values()
+        return [dict(zip(values[0], row)) for row in values[1:]]
+
+    def get_values(self, range_name):
+        """Rows of an open-ended A1 range such as 'A5:C'"""
+        self._call('get_values')
+        match = re.match(r'^[A-Z]+(\d+):([A-Z]+)$', range_name)
+        if match is None:
+            raise ValueError(f"Unsupported range: {range_name}")
+        first_row = int(match.group(1))
+        with self._lock:
+            return [list(row) for row in self.rows[first_row - 1:]]
+
+    def _check_failure(self):
+        with self._lock:
+            if self.fail_appends > 0:
+                self.fail_appends -= 1
+                raise ConnectionError("Simulated sheet outage")
+
+    def append_row(self, values):
+        self._call('append_row')
+        self._check_failure()
+        with self._lock:
+            self.rows.append([str(value) for value in values])
+        return {}
+
+    def append_rows(self, values):
+        self._call('append_rows')
+        self._check_failure()
+        with self._lock:
+            self.rows.extend([str(value) for value in row] for row in values)
+        return {}